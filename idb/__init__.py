@@ -1,4 +1,9 @@
+import os
+import mmap
+import logging
 import contextlib
+import multiprocessing
+from collections import namedtuple
 
 import six
 
@@ -8,6 +13,9 @@ import six
 from idb.idapython import IDAPython
 
 
+logger = logging.getLogger(__name__)
+
+
 if six.PY2:
     def memview(buf):
         # on py2.7, we get this madness::
@@ -19,23 +27,302 @@ else:
         return memoryview(buf)
 
 
+def _close_mapping(mm):
+    '''
+    unmap the given memory mapping,
+     unless the caller still holds slices of it, in which case it's unmapped once they're garbage collected.
+    '''
+    try:
+        mm.close()
+    except BufferError:
+        logger.debug('mapping still referenced, deferring close.')
+
+
 @contextlib.contextmanager
-def from_file(path):
+def from_file(path, use_mmap=False, use_pread=False, lazy_inflate=False, cache_dir=None, inflate_threads=0,
+              zero_copy=False):
+    '''
+    open the IDA Pro database at the given path.
+
+    Args:
+      path (str): the path to the .idb or .i64 file.
+      use_mmap (bool): map the file into memory rather than reading it all up front.
+        the sections are then zero-copy slices of the mapping,
+         so only the pages touched by queries are faulted in.
+        compressed sections are still inflated into memory, see `lazy_inflate`.
+        the mapping is closed when the context exits, so the database must not be used once it does.
+        if the caller still holds slices of the mapping (such as `zero_copy` values),
+         it's unmapped once they're garbage collected instead.
+      use_pread (bool): fetch data from the file on demand using positional reads,
+        keeping only a bounded pool of recently read pages in memory.
+        use this where mmap is unavailable or undesirable,
+         such as on network filesystems or in a 32-bit address space.
+        the database must not be used once the context exits.
+      lazy_inflate (bool): inflate zlib-packed sections on demand,
+        around the requested offsets, rather than all at once.
+      cache_dir (str): if provided, decompressed sections are stored in this directory,
+        and reopened via mmap the next time this (unmodified) database is opened.
+      inflate_threads (int): if provided, inflate the compressed sections concurrently
+        using this many threads when the database is opened.
+        otherwise, each section is inflated when it is first accessed.
+      zero_copy (bool): netnode values are returned as memoryview slices of the B-tree pages,
+        rather than copied into bytes.
+        this saves allocations when only a few fields are decoded from each value.
+
+    Example::
+
+        with idb.from_file('kernel32.idb', use_mmap=True) as db:
+            print(idb.analysis.Root(db).md5)
+    '''
     # break import cycle
     import idb.fileformat
 
+    cache = None
+    if cache_dir is not None:
+        cache = idb.fileformat.SectionCache(cache_dir, path)
+
     with open(path, 'rb') as f:
-        buf = memview(f.read())
-        db = idb.fileformat.IDB(buf)
-        db.vsParse(buf)
-        yield db
+        if use_mmap:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            buf = memview(mm)
+        elif use_pread:
+            mm = None
+            buf = idb.fileformat.FileBuffer(f)
+        else:
+            mm = None
+            buf = memview(f.read())
 
+        db = None
+        try:
+            db = idb.fileformat.IDB(buf, lazy_inflate=lazy_inflate, cache=cache, zero_copy=zero_copy)
+            db.vsParse(buf)
+            if inflate_threads:
+                db.inflate_sections(threads=inflate_threads)
+            yield db
+        finally:
+            if mm is not None:
+                # drop our own references to the mapping, so it can be closed right away.
+                if db is not None:
+                    db.close()
+                    db = None
+                if isinstance(buf, memoryview):
+                    buf.release()
+                buf = None
+                _close_mapping(mm)
 
-def from_buffer(buf):
+
+def from_buffer(buf, lazy_inflate=False, inflate_threads=0, zero_copy=False):
     # break import cycle
     import idb.fileformat
 
     buf = memview(buf)
-    db = idb.fileformat.IDB(buf)
+    db = idb.fileformat.IDB(buf, lazy_inflate=lazy_inflate, zero_copy=zero_copy)
     db.vsParse(buf)
+    if inflate_threads:
+        db.inflate_sections(threads=inflate_threads)
     return db
+
+
+@contextlib.contextmanager
+def from_components(path, use_mmap=False, use_pread=False, wordsize=None, zero_copy=False):
+    '''
+    open the IDA Pro database that is unpacked into component files
+     (`.id0`, `.id1`, `.nam`, and `.til`), as IDA leaves them while the database is open.
+    each component is opened separately, so the database doesn't need to be repacked.
+
+    Args:
+      path (str): the directory containing the components,
+        or the path to the database, with or without extension (like `foo.idb` or `foo`).
+      use_mmap (bool): map the components into memory rather than reading them up front.
+      use_pread (bool): fetch data from the components on demand using positional reads.
+        the database must not be used once the context exits.
+      wordsize (int): the word size of the database, 4 or 8.
+        if not provided, this is inferred from ID0.
+      zero_copy (bool): netnode values are returned as memoryview slices, see `from_file`.
+
+    Example::
+
+        with idb.from_components('tests/data/empty/empty') as db:
+            print(idb.analysis.Root(db).md5)
+    '''
+    # break import cycle
+    import idb.fileformat
+
+    if os.path.isdir(path):
+        basenames = set(os.path.splitext(filename)[0]
+                        for filename in os.listdir(path)
+                        if filename.lower().endswith('.id0'))
+        if len(basenames) != 1:
+            raise ValueError('expected exactly one .id0 component in: %s' % (path))
+        basename = os.path.join(path, basenames.pop())
+    else:
+        basename, ext = os.path.splitext(path)
+        if ext.lower() not in ('.idb', '.i64', '.id0', '.id1', '.id2', '.nam', '.til'):
+            basename = path
+
+    if not os.path.exists(basename + '.id0'):
+        raise ValueError('missing component: %s.id0' % (basename))
+
+    files = []
+    maps = []
+    buffers = {}
+    db = None
+    try:
+        for sectiondef in idb.fileformat.SECTIONS:
+            if sectiondef.cls is None:
+                continue
+
+            filename = basename + '.' + sectiondef.name
+            if not os.path.exists(filename):
+                logger.debug('missing component: %s', filename)
+                continue
+
+            f = open(filename, 'rb')
+            files.append(f)
+
+            if os.fstat(f.fileno()).st_size == 0:
+                # can't map an empty file.
+                buffers[sectiondef.name] = b''
+            elif use_mmap:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                maps.append(mm)
+                buffers[sectiondef.name] = memview(mm)
+            elif use_pread:
+                buffers[sectiondef.name] = idb.fileformat.FileBuffer(f)
+            else:
+                buffers[sectiondef.name] = memview(f.read())
+
+        db = idb.fileformat.IDBComponents(buffers, wordsize=wordsize, zero_copy=zero_copy)
+        yield db
+    finally:
+        if maps:
+            # drop our own references to the mappings, so they can be closed right away.
+            if db is not None:
+                db.close()
+                db = None
+            for view in buffers.values():
+                if isinstance(view, memoryview):
+                    view.release()
+            buffers = None
+        for mm in maps:
+            _close_mapping(mm)
+        for f in files:
+            f.close()
+
+
+def collect_entries(db, entries):
+    '''
+    the default partition function for `scan_parallel`:
+     materialize the (key, value) pairs, so they can be sent between processes.
+    '''
+    return [(key, bytes(value)) for key, value in entries]
+
+
+def _scan_partition(args):
+    path, start_key, end_key, func, kwargs = args
+    with from_file(path, **kwargs) as db:
+        return func(db, db.id0.scan(start_key, end_key))
+
+
+def scan_parallel(path, func=collect_entries, processes=None, partitions=None, **kwargs):
+    '''
+    scan the entire ID0 index of the database at the given path using a pool of processes.
+
+    the key space is split into disjoint ranges (see `ID0.partition`),
+     and each worker reopens the database and scans one range at a time.
+    the results are generated in key order, so they can be concatenated or merged.
+
+    Args:
+      path (str): the path to the .idb or .i64 file.
+      func (Callable[[IDB, Iterator[Tuple[bytes, bytes]]], Any]): invoked in a worker
+        with the database and the entries of one range, in order.
+        it must be picklable (defined at the top level of a module), as must its result.
+        by default, the entries are returned as a list.
+      processes (int): the number of worker processes. default: the number of CPUs.
+      partitions (int): the number of ranges. default: four per process, to balance the load.
+      **kwargs: passed to `from_file` when opening the database. default: `use_mmap=True`.
+        for a compressed database, provide `cache_dir`, so the ID0 section is only inflated once.
+
+    Yields:
+      Any: the result of `func` for each range, in key order.
+
+    Example::
+
+        def count_entries(db, entries):
+            return sum(1 for _ in entries)
+
+        print(sum(idb.scan_parallel('kernel32.idb', count_entries)))
+    '''
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if partitions is None:
+        partitions = 4 * processes
+    kwargs.setdefault('use_mmap', True)
+
+    with from_file(path, **kwargs) as db:
+        ranges = db.id0.partition(partitions)
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        tasks = [(path, start_key, end_key, func, kwargs) for start_key, end_key in ranges]
+        for result in pool.imap(_scan_partition, tasks):
+            yield result
+        pool.close()
+    finally:
+        # if the caller stopped early, don't wait for the remaining ranges.
+        pool.terminate()
+        pool.join()
+
+
+ProbeResult = namedtuple('ProbeResult', ['wordsize', 'version', 'version_string', 'md5', 'input_file_path'])
+
+
+def probe(path):
+    '''
+    fetch summary metadata from the IDA Pro database at the given path.
+
+    this reads only the file header, the ID0 header, and the handful of B-tree pages
+     needed to resolve the `Root Node` fields, using positional reads.
+    so, for an uncompressed database, the cost does not depend upon the size of the database.
+
+    a compressed (packed) database can't be read at random, though.
+    the ID0 section is inflated from its start through the last page that is read,
+     which may be anywhere in the section,
+     and a decompressor snapshot (about 40KB) is kept for each `ZlibBuffer.SPAN` bytes inflated.
+    so, both the time and memory grow with the size of the ID0 section.
+
+    Args:
+      path (str): the path to the .idb or .i64 file.
+
+    Returns:
+      ProbeResult: the metadata.
+        fields that are not present (or cannot be decoded) are None.
+
+    Example::
+
+        info = idb.probe('kernel32.idb')
+        assert info.wordsize == 4
+        assert info.version == 695
+    '''
+    # break import cycle
+    import idb.analysis
+    import idb.fileformat
+
+    with open(path, 'rb') as f:
+        buf = idb.fileformat.FileBuffer(f)
+        db = idb.fileformat.IDB(buf, lazy_inflate=True)
+        db.vsParse(buf)
+
+        root = idb.analysis.Root(db)
+
+        def get_field(name):
+            try:
+                return getattr(root, name)
+            except (KeyError, UnicodeDecodeError):
+                return None
+
+        return ProbeResult(db.wordsize,
+                           get_field('version'),
+                           get_field('version_string'),
+                           get_field('md5'),
+                           get_field('input_file_path'))
@@ -58,7 +58,8 @@ def cast(buf, V, wordsize=None):
         assert s.gid == 0x1000
     '''
     v = V(wordsize=wordsize)
-    v.vsParse(buf)
+    # vstruct string fields expect bytes, so copy any memoryview.
+    v.vsParse(bytes(buf))
     return v
 
 
@@ -227,10 +228,10 @@ class _Analysis(object):
     def __init__(self, db, nodeid, fields):
         self.idb = db
         self.nodeid = nodeid
-        self.netnode = idb.netnode.Netnode(db, nodeid)
+        self.netnode = idb.netnode.get_netnode(db, nodeid)
         self.fields = fields
 
-        idb_version = idb.netnode.Netnode(db, 'Root Node').altval(index=-1)
+        idb_version = idb.netnode.get_netnode(db, 'Root Node').altval(index=-1)
 
         # note that order of fields is important:
         #   fields with matching minvers override previously defined fields of the same name
@@ -312,25 +313,25 @@ class _Analysis(object):
                 raise ValueError('unexpected index')
 
             # indexes are variable, so map them to the values
+            # this is a copy, unless the database is in zero-copy mode.
             ret = {}
-            for sup in self.netnode.supentries(tag=field.tag):
-                if not nfilter(sup.parsed_key.index):
+            for index, v in self.netnode.load_tag(field.tag, decode='raw').items():
+                if not nfilter(index):
                     continue
 
                 if field.cast is None:
-                    ret[sup.parsed_key.index] = bytes(sup.value)
+                    ret[index] = v
                 else:
-                    v = field.cast(bytes(sup.value), wordsize=self.idb.wordsize)
-                    ret[sup.parsed_key.index] = v
+                    ret[index] = field.cast(v, wordsize=self.idb.wordsize)
             return ret
         else:
             # normal field with an explicit index
+            # this is a copy, unless the database is in zero-copy mode.
             v = self.netnode.supval(field.index, tag=field.tag)
             if field.cast is None:
-                return bytes(v)
+                return v
             else:
-                return field.cast(bytes(v),
-                                  wordsize=self.idb.wordsize)
+                return field.cast(v, wordsize=self.idb.wordsize)
 
     def get_field_tag(self, name):
         '''
@@ -670,7 +671,7 @@ class StructMember:
 
         v = self.netnode.supval(tag='S', index=0x3000)
         s = TypeString()
-        s.vsParse(v)
+        s.vsParse(bytes(v))
         return s.s
 
     def get_enum_id(self):
@@ -821,8 +822,9 @@ class Function:
             return 'sub_%X' % (self.nodeid)
 
     def get_signature(self):
-        typebuf = self.netnode.supval(tag='S', index=0x3000)
-        namebuf = self.netnode.supval(tag='S', index=0x3001)
+        # vstruct string fields expect bytes, so copy any memoryview.
+        typebuf = bytes(self.netnode.supval(tag='S', index=0x3000))
+        namebuf = bytes(self.netnode.supval(tag='S', index=0x3001))
 
         if six.indexbytes(typebuf, 0x0) != 0xC:
             raise RuntimeError('unexpected signature header')
@@ -925,16 +927,13 @@ def _get_xrefs(db, tag, src=None, dst=None, types=None):
     if src is None and dst is None:
         raise ValueError('one of src or dst must be provided')
 
-    nn = idb.netnode.Netnode(db, src if dst is None else dst)
-    try:
-        for entry in nn.charentries(tag=tag):
-            if (types and entry.value in types) or (not types):
-                if src is not None:
-                    yield Xref(src, entry.parsed_key.index, entry.value)
-                else:  # have dst
-                    yield Xref(entry.parsed_key.index, dst, entry.value)
-    except KeyError:
-        return
+    nn = idb.netnode.get_netnode(db, src if dst is None else dst)
+    for index, type_ in nn.load_tag(tag, decode='int').items():
+        if (types and type_ in types) or (not types):
+            if src is not None:
+                yield Xref(src, index, type_)
+            else:  # have dst
+                yield Xref(index, dst, type_)
 
 
 def get_crefs_to(db, ea, types=None):
@@ -1063,6 +1062,8 @@ Fixups = Analysis('$ fixups', [
 
 
 def parse_seg_strings(buf, wordsize=None):
+    # vstruct string fields expect bytes, so copy any memoryview.
+    buf = bytes(buf)
     strings = []
     offset = 0x0
 
@@ -1171,13 +1172,13 @@ def enumerate_imports(db):
         nnref = imps.lib_netnodes[index]
         nn = idb.netnode.Netnode(db, nnref)
 
-        for funcaddr in nn.sups():
+        for funcaddr, buf in nn.load_tag(idb.netnode.TAGS.SUPVAL, decode='raw').items():
             try:
-                funcname = nn.supstr(funcaddr)
-                yield Import(libname, funcname, funcaddr)
-            except KeyError:
-                logger.warning('failed to find import supval: %x', funcaddr)
+                funcname = idb.netnode.as_string(buf)
+            except UnicodeDecodeError:
+                logger.warning('failed to decode import supval: %x', funcaddr)
                 continue
+            yield Import(libname, funcname, funcaddr)
 
 
 EntryPoints = Analysis('$ entry points', [
@@ -1,13 +1,26 @@
 '''
 lots of inspiration from: https://github.com/nlitsme/pyidbutil
 '''
+import os
+import sys
 import abc
+import errno
+import math
+import mmap
+import bisect
 import zlib
+import array
 import struct
+import hashlib
 import logging
+import tempfile
+import contextlib
+import threading
 import functools
 from collections import namedtuple
+from collections import OrderedDict
 
+import six
 import vstruct
 from vstruct.primitives import v_bytes
 from vstruct.primitives import v_uint8
@@ -22,6 +35,27 @@ import idb.netnode
 logger = logging.getLogger(__name__)
 
 
+class v_slice(v_bytes):
+    '''
+    a `v_bytes` that is only ever populated by slicing the source buffer.
+
+    `v_bytes.vsSetLength` materializes a zero-filled placeholder of the new size,
+     which, for section-sized fields, defeats parsing from a memory-mapped file.
+    '''
+    def vsSetLength(self, size):
+        size = int(size)
+        self._vs_length = size
+        self._vs_fmt = '%ds' % size
+
+    def vsParse(self, fbytes, offset=0):
+        offend = offset + self._vs_length
+        if isinstance(fbytes, LazyBuffer):
+            self._vs_value = fbytes.view(offset, offend)
+        else:
+            self._vs_value = fbytes[offset:offend]
+        return offend
+
+
 class FileHeader(vstruct.VStruct):
     def __init__(self):
         vstruct.VStruct.__init__(self)
@@ -50,6 +84,11 @@ class FileHeader(vstruct.VStruct):
         self.offset6 = v_uint64()
         self.checksum6 = v_uint32()
 
+    def pcb_signature(self):
+        # copy the signature, so the header doesn't keep the underlying buffer
+        #  (perhaps a memory mapping, see `IDB.close()`) alive.
+        self.signature = bytes(self.signature)
+
     def pcb_version(self):
         if self.version != 0x6:
             raise NotImplementedError('unsupported version: %d' % (self.version))
@@ -85,6 +124,309 @@ class COMPRESSION_METHOD:
     ZLIB = 2
 
 
+class LazyBuffer(object):
+    '''
+    a read-only buffer whose contents are produced on demand.
+
+    slicing returns bytes, just like slicing a memoryview of bytes would,
+     so vstruct parsers and `struct.unpack` work unmodified.
+    use `.view()` to take a sub-range without materializing it.
+
+    subclasses implement `.read()` and `__len__`.
+    '''
+    def read(self, offset, size):
+        '''
+        fetch up to `size` bytes from the given offset.
+        fewer bytes are returned when the range extends beyond the end of the buffer.
+        '''
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+    def view(self, start, end=None):
+        '''
+        fetch a lazy sub-range of this buffer.
+        like slicing, the range is clamped to the end of the buffer.
+        '''
+        length = len(self)
+        if end is None or end > length:
+            end = length
+        return LazyView(self, min(start, end), end)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop = index.start, index.stop
+            if index.step not in (None, 1):
+                raise ValueError('unsupported slice step')
+            if start is None:
+                start = 0
+            if stop is None or start < 0 or stop < 0:
+                start, stop, _ = index.indices(len(self))
+            return self.read(start, max(0, stop - start))
+        else:
+            if index < 0:
+                index += len(self)
+            b = self.read(index, 1)
+            if not b:
+                raise IndexError(index)
+            return six.indexbytes(b, 0x0)
+
+    def __bytes__(self):
+        return self.read(0, len(self))
+
+    if six.PY2:
+        def __str__(self):
+            return self.__bytes__()
+
+
+class LazyView(LazyBuffer):
+    '''
+    a window into another `LazyBuffer`.
+    '''
+    def __init__(self, base, start, end):
+        super(LazyView, self).__init__()
+        self.base = base
+        self.start = start
+        self.end = end
+
+    def read(self, offset, size):
+        size = min(size, self.end - self.start - offset)
+        if size <= 0:
+            return b''
+        return self.base.read(self.start + offset, size)
+
+    def view(self, start, end=None):
+        length = len(self)
+        if end is None or end > length:
+            end = length
+        return LazyView(self.base, self.start + min(start, end), self.start + end)
+
+    def __len__(self):
+        return self.end - self.start
+
+
+def as_view(buf):
+    '''
+    wrap the given buffer so that it may be sliced cheaply.
+    `LazyBuffer` instances already support this, so they're returned as-is.
+    '''
+    if isinstance(buf, LazyBuffer):
+        return buf
+    return idb.memview(buf)
+
+
+class FileBuffer(LazyBuffer):
+    '''
+    random-access view of an open file, via positional reads.
+
+    nothing is read until it is requested,
+     so memory usage does not depend upon the size of the file.
+
+    small reads are served from a bounded pool of recently read, fixed-size blocks.
+    the default block size matches the B-tree page size (`ID0.page_size`)
+     and the flags page size (`ID1.PAGE_SIZE`),
+     so a page fetch costs at most two reads, and repeated fetches cost none.
+    reads larger than a block (like inflating a compressed section)
+     bypass the pool, so they don't evict the hot pages.
+    '''
+    # number of bytes in each pooled block.
+    BLOCK_SIZE = 0x2000
+    # number of blocks to keep around, 8MB by default.
+    CACHE_SIZE = 0x400
+
+    def __init__(self, f, block_size=BLOCK_SIZE, cache_size=CACHE_SIZE):
+        super(FileBuffer, self).__init__()
+        self.f = f
+        self.fd = f.fileno()
+        self.length = os.fstat(self.fd).st_size
+        self.block_size = block_size
+        self.cache_size = cache_size
+
+        # map from block number to bytes, in least-recently used order.
+        self._blocks = OrderedDict()
+        # guards `_blocks` and the file position, when sections are inflated concurrently.
+        self._lock = threading.Lock()
+
+    def _pread(self, offset, size):
+        if hasattr(os, 'pread'):
+            return os.pread(self.fd, size, offset)
+        else:
+            # py2.7 and Windows
+            with self._lock:
+                self.f.seek(offset)
+                return self.f.read(size)
+
+    def get_block(self, index):
+        '''
+        fetch the contents of the given block, reading it from the file if it's not in the pool.
+        the final block of the file may be short.
+        '''
+        with self._lock:
+            block = self._blocks.pop(index, None)
+            if block is not None:
+                self._blocks[index] = block
+                return block
+
+        block = self._pread(index * self.block_size, self.block_size)
+
+        with self._lock:
+            self._blocks[index] = block
+            while len(self._blocks) > self.cache_size:
+                self._blocks.popitem(last=False)
+        return block
+
+    def read(self, offset, size):
+        size = min(size, self.length - offset)
+        if size <= 0:
+            return b''
+
+        if size > self.block_size or self.cache_size <= 0:
+            return self._pread(offset, size)
+
+        index, delta = divmod(offset, self.block_size)
+        block = self.get_block(index)
+        if delta + size <= len(block):
+            return block[delta:delta + size]
+
+        # the range straddles a block boundary.
+        head = block[delta:]
+        return head + self.get_block(index + 1)[:size - len(head)]
+
+    def __len__(self):
+        return self.length
+
+
+def decompress(buf):
+    '''
+    inflate the given zlib-compressed buffer, which may be a `LazyBuffer`.
+    '''
+    if isinstance(buf, LazyBuffer):
+        buf = bytes(buf)
+    return zlib.decompress(buf)
+
+
+class ZlibBuffer(LazyBuffer):
+    '''
+    random-access view of a zlib-compressed buffer.
+
+    this is a zran-style index: as the stream is inflated,
+     the state of the decompressor (including its window) is snapshotted
+     every `span` bytes of output.
+    a read then inflates only the spans that cover the requested range,
+     resuming from the nearest preceding snapshot.
+    the most recently inflated spans are kept around,
+     so neighbouring reads (like consecutive B-tree pages) are cheap.
+
+    the snapshots are `zlib.decompressobj` copies, which cannot be serialized,
+     so the index lives only as long as this instance.
+    '''
+    # number of bytes of output between decompressor snapshots.
+    SPAN = 0x100000
+    # number of inflated spans to keep around.
+    CACHE_SIZE = 4
+    # number of bytes of input to feed the decompressor at a time.
+    INPUT_SIZE = 0x10000
+
+    def __init__(self, buf, span=SPAN, cache_size=CACHE_SIZE):
+        super(ZlibBuffer, self).__init__()
+        self.buf = as_view(buf)
+        self.span = span
+        self.cache_size = cache_size
+
+        # list of (input offset, decompressor) pairs.
+        # the decompressor in entry N is ready to produce output byte `N * span`.
+        self._checkpoints = [(0, zlib.decompressobj())]
+        # the total number of bytes of output, once the end of the stream is found.
+        self._length = None
+        # map from span number to inflated bytes, in least-recently used order.
+        self._spans = OrderedDict()
+
+    def _inflate_span(self, index):
+        '''
+        inflate the given span from its snapshot, recording the snapshot for the next span.
+        the snapshot for the given span must already exist.
+        '''
+        offset, d = self._checkpoints[index]
+        d = d.copy()
+
+        chunks = []
+        need = self.span
+        while need > 0 and not d.eof:
+            chunk = self.buf[offset:offset + self.INPUT_SIZE]
+            out = d.decompress(chunk, need)
+            offset += len(chunk) - len(d.unconsumed_tail)
+            if not out and not chunk:
+                logger.warning('truncated zlib stream')
+                break
+            chunks.append(out)
+            need -= len(out)
+        data = b''.join(chunks)
+
+        if need > 0:
+            self._length = index * self.span + len(data)
+        elif index + 1 == len(self._checkpoints):
+            self._checkpoints.append((offset, d))
+
+        return data
+
+    def get_span(self, index):
+        '''
+        fetch the inflated bytes for the given span number.
+        the final span may be short, and spans beyond the end of the stream are empty.
+        '''
+        data = self._spans.get(index)
+        if data is not None:
+            # mark as most recently used
+            del self._spans[index]
+            self._spans[index] = data
+            return data
+
+        # extend the index up to the requested span.
+        while len(self._checkpoints) <= index:
+            if self._length is not None:
+                return b''
+            self._cache_span(len(self._checkpoints) - 1,
+                             self._inflate_span(len(self._checkpoints) - 1))
+
+        data = self._inflate_span(index)
+        self._cache_span(index, data)
+        return data
+
+    def _cache_span(self, index, data):
+        self._spans[index] = data
+        while len(self._spans) > self.cache_size:
+            self._spans.popitem(last=False)
+
+    def read(self, offset, size):
+        chunks = []
+        while size > 0:
+            index, delta = divmod(offset, self.span)
+            chunk = self.get_span(index)[delta:delta + size]
+            if not chunk:
+                break
+            chunks.append(chunk)
+            offset += len(chunk)
+            size -= len(chunk)
+
+        if len(chunks) == 1:
+            return chunks[0]
+        return b''.join(chunks)
+
+    def __len__(self):
+        # inflate the remainder of the stream, which completes the index.
+        while self._length is None:
+            self.get_span(len(self._checkpoints) - 1)
+        return self._length
+
+    def view(self, start, end=None):
+        if end is not None and self._length is None:
+            # don't inflate the entire stream just to clamp the range.
+            # reads beyond the end of the stream still come back short.
+            return LazyView(self, start, end)
+        return super(ZlibBuffer, self).view(start, end)
+
+
 class SectionHeader(vstruct.VStruct):
     def __init__(self):
         vstruct.VStruct.__init__(self)
@@ -99,11 +441,118 @@ class SectionHeader(vstruct.VStruct):
             self.is_compressed = True
 
 
+@contextlib.contextmanager
+def atomic_write(path):
+    '''
+    write a file by writing a temporary file in the same directory, then moving it into place,
+     so concurrent readers never observe a partially written file.
+    if the body raises an exception, the temporary file is removed and nothing is moved.
+
+    Example::
+
+        with atomic_write(path) as f:
+            f.write(buf)
+    '''
+    directory = os.path.dirname(os.path.abspath(path))
+    f = tempfile.NamedTemporaryFile(dir=directory, delete=False)
+    try:
+        with f:
+            yield f
+        os.rename(f.name, path)
+    except Exception:
+        os.unlink(f.name)
+        raise
+
+
+class SectionCache(object):
+    '''
+    on-disk cache of decompressed section contents.
+
+    entries are keyed by the identity of the database file (path, size, and mtime)
+     along with the section index and checksum,
+     so a modified database never hits stale entries.
+    entries are reopened via mmap, so a hit costs neither decompression nor a copy.
+
+    Example::
+
+        cache = SectionCache('/tmp/idbcache', 'kernel32.i64')
+        contents = cache.inflate((0, checksum), compressed)
+    '''
+    # number of bytes of input to feed the decompressor at a time.
+    INPUT_SIZE = 0x100000
+
+    def __init__(self, directory, path):
+        self.directory = directory
+        try:
+            os.makedirs(directory)
+        except OSError as e:
+            # the directory already exists, perhaps created concurrently by another worker.
+            if e.errno != errno.EEXIST:
+                raise
+        st = os.stat(path)
+        self.identity = '%s:%d:%r' % (os.path.abspath(path), st.st_size, st.st_mtime)
+
+    def get_path(self, key):
+        '''
+        compute the path of the cache entry for the given key.
+
+        Args:
+          key (Tuple[int, int]): the section index and checksum.
+        '''
+        index, checksum = key
+        name = '%s:%d:%08x' % (self.identity, index, checksum)
+        digest = hashlib.sha256(name.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest + '.section')
+
+    def _store(self, path, buf):
+        # inflate incrementally, rather than into memory all at once.
+        d = zlib.decompressobj()
+        try:
+            with atomic_write(path) as f:
+                for offset in range(0, len(buf), self.INPUT_SIZE):
+                    f.write(d.decompress(buf[offset:offset + self.INPUT_SIZE]))
+                f.write(d.flush())
+        except Exception:
+            if not os.path.exists(path):
+                raise
+            # lost a race with another process caching the same section, which is fine.
+        logger.debug('cached decompressed section: %s', path)
+
+    def _load(self, path):
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # can't map an empty file.
+                return b''
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return idb.memview(mm)
+
+    def inflate(self, key, buf):
+        '''
+        fetch the decompressed contents of a section, decompressing and caching it if necessary.
+
+        Args:
+          key (Tuple[int, int]): the section index and checksum.
+          buf (bytes): the zlib-compressed section contents.
+
+        Returns:
+          bytes: the decompressed section contents, possibly backed by a memory mapping.
+        '''
+        path = self.get_path(key)
+        if not os.path.exists(path):
+            self._store(path, buf)
+        else:
+            logger.debug('found cached section: %s', path)
+        return self._load(path)
+
+
 class Section(vstruct.VStruct):
-    def __init__(self):
+    def __init__(self, inflate=decompress):
         vstruct.VStruct.__init__(self)
+        # callable that produces the contents of a compressed section from the raw bytes.
+        # for example, `decompress` or `ZlibBuffer`.
+        self.inflate = inflate
         self.header = SectionHeader()
-        self._contents = v_bytes()
+        self._contents = v_slice()
         self.contents = b''
 
     def vsEmit(self, **kwargs):
@@ -119,7 +568,7 @@ class Section(vstruct.VStruct):
         if not self.header.is_compressed:
             self.contents = self._contents
         else:
-            self.contents = zlib.decompress(self._contents)
+            self.contents = self.inflate(self._contents)
             logger.debug('decompressed parsed section.')
 
     def validate(self):
@@ -189,6 +638,38 @@ class LeafEntry(vstruct.VStruct):
         self.key = self.pkey[:self.common_prefix] + self._key
 
 
+# precompiled layouts of the structures above,
+#  used to decode the entry table of a page without allocating vstructs.
+#
+# LeafEntryPointer: common_prefix, unk02, offset
+LEAF_ENTRY_POINTER = struct.Struct('<HHH')
+# BranchEntryPointer: page, offset
+BRANCH_ENTRY_POINTER = struct.Struct('<IH')
+# the key_length and value_length fields of LeafEntry and BranchEntry.
+ENTRY_LENGTH = struct.Struct('<H')
+
+
+class PageEntry(object):
+    '''
+    a decoded b-tree entry.
+
+    Attributes:
+      key (bytes): the full key of the entry.
+      value (memoryview): the value of the entry, sliced from the page contents without copying.
+      page (Optional[int]): for entries from branch nodes,
+        the page number of the node with keys greater than this one.
+    '''
+    __slots__ = ('key', 'value', 'page')
+
+    def __init__(self, key, value, page=None):
+        self.key = key
+        self.value = value
+        self.page = page
+
+    def __repr__(self):
+        return 'PageEntry(key=%r)' % (self.key)
+
+
 class Page(vstruct.VStruct):
     '''
     single node in the b-tree.
@@ -222,15 +703,28 @@ class Page(vstruct.VStruct):
         +-----------------------------+
 
     '''
-
     def __init__(self, page_size, page_number):
         vstruct.VStruct.__init__(self)
         self.page_number = page_number
         self.ppointer = v_uint32()
         self.entry_count = v_uint16()
         self.contents = v_bytes(page_size)
-        # ordered cache of entries, once loaded.
-        self._entries = []
+
+        # the decoded entries, once loaded, see `_load_entries`.
+        # the leading bytes shared by every key on this page.
+        self._prefix = None
+        # ordered list of the remainder of each key after the shared prefix.
+        # this is a list, rather than one buffer, so that `.bisect()` can use `bisect.bisect_left`,
+        #  which compares the suffixes without slicing a copy of each one.
+        self._suffixes = None
+        # offset of each value within `.contents`.
+        self._value_offsets = None
+        # length of each value.
+        self._value_lengths = None
+        # for branch nodes, the page number pointed to by each entry.
+        self._pages = None
+        # `.contents` as a memoryview, from which values are sliced without copying.
+        self._view = None
 
     def is_leaf(self):
         '''
@@ -242,23 +736,137 @@ class Page(vstruct.VStruct):
         return self.ppointer == 0
 
     def _load_entries(self):
-        if not self._entries:
-            key = b''
-            for i in range(self.entry_count):
-                if self.is_leaf():
-                    ptr = LeafEntryPointer()
-                    ptr.vsParse(self.contents, offset=i * SIZEOF_ENTRY)
-
-                    entry = LeafEntry(key, ptr.common_prefix)
-                    entry.vsParse(self.contents, offset=ptr.offset - SIZEOF_ENTRY)
-                else:
-                    ptr = BranchEntryPointer()
-                    ptr.vsParse(self.contents, offset=i * SIZEOF_ENTRY)
+        '''
+        decode the entry table into the shared key prefix, the key suffixes,
+         and flat arrays of value spans and page pointers.
+
+        this is equivalent to parsing a `LeafEntryPointer`/`LeafEntry`
+         (or `BranchEntryPointer`/`BranchEntry`) for each entry,
+         but without allocating a vstruct per field.
+
+        the prefix shared by every key on the page is stored once,
+         followed by the remaining suffix of each key, which is all that searches compare.
+        full keys and entry objects are created only when requested, see `.get_key()` and `.get_entry()`.
+        '''
+        if self._suffixes is not None:
+            return
+
+        buf = self.contents
+        view = idb.memview(buf)
+        count = self.entry_count
+
+        # decode the entry table up front.
+        if self.is_leaf():
+            pointers = [LEAF_ENTRY_POINTER.unpack_from(buf, i * SIZEOF_ENTRY) for i in range(count)]
+            # number of leading bytes each key shares with the prior key.
+            # the first key has no prior key.
+            common_prefixes = [0] + [pointer[0] for pointer in pointers[1:]]
+            # entry offsets are relative to the start of the page, not the contents.
+            offsets = [pointer[2] - SIZEOF_ENTRY for pointer in pointers]
+            pages = array.array('I')
+        else:
+            pointers = [BRANCH_ENTRY_POINTER.unpack_from(buf, i * SIZEOF_ENTRY) for i in range(count)]
+            common_prefixes = [0] * count
+            offsets = [pointer[1] - SIZEOF_ENTRY for pointer in pointers]
+            pages = array.array('I', [pointer[0] for pointer in pointers])
+
+        # the length of the prefix shared by all the keys on the page.
+        # the keys are sorted, so this is the common prefix of the first and last keys.
+        # for leaf pages, that's at least the shortest prefix any key shares with its prior key.
+        if count == 0:
+            prefix_length = 0
+            self._prefix = b''
+        else:
+            first = self._get_stored_key(offsets[0])
+            if self.is_leaf():
+                prefix_length = min(common_prefixes[1:] + [len(first)])
+            else:
+                last = self._get_stored_key(offsets[-1])
+                prefix_length = len(os.path.commonprefix([first, last]))
+            self._prefix = first[:prefix_length]
+
+        suffixes = []
+        value_offsets = array.array('I')
+        value_lengths = array.array('I')
+        suffix = b''
+        for i in range(count):
+            offset = offsets[i]
+            key_length, = ENTRY_LENGTH.unpack_from(buf, offset)
+            offset += ENTRY_LENGTH.size
+            end = offset + key_length
+
+            # each key suffix is the shared part of the prior suffix, followed by the stored key bytes.
+            shared = common_prefixes[i] - prefix_length
+            if shared > 0:
+                suffix = suffix[:shared] + view[offset:end]
+            else:
+                # the stored bytes may begin with (part of) the page prefix,
+                #  as for the first key of a leaf page, or any key of a branch page.
+                suffix = bytes(view[offset - shared:end])
+            suffixes.append(suffix)
+
+            value_length, = ENTRY_LENGTH.unpack_from(buf, end)
+            value_offsets.append(end + ENTRY_LENGTH.size)
+            value_lengths.append(value_length)
+
+        self._value_offsets = value_offsets
+        self._value_lengths = value_lengths
+        self._pages = pages
+        self._view = view
+        # assign this last, as it marks the entries as loaded.
+        self._suffixes = suffixes
+
+    def _get_stored_key(self, offset):
+        '''
+        fetch the key bytes stored with the entry data at the given offset into the contents.
+        '''
+        key_length, = ENTRY_LENGTH.unpack_from(self.contents, offset)
+        offset += ENTRY_LENGTH.size
+        return bytes(self.contents[offset:offset + key_length])
+
+    def get_key(self, entry_number):
+        '''
+        reconstruct the full key of the entry at the given index,
+         without creating the entry object.
+
+        Arguments:
+          entry_number (int): the entry index.
+
+        Returns:
+          bytes: the key.
+        '''
+        suffixes = self._suffixes
+        if suffixes is None:
+            self._load_entries()
+            suffixes = self._suffixes
+        return self._prefix + suffixes[entry_number]
+
+    def get_entry_count(self):
+        '''
+        fetch the number of entries on this page.
+        this is the same as `.entry_count`, without the overhead of the vstruct field.
 
-                    entry = BranchEntry(int(ptr.page))
-                    entry.vsParse(self.contents, offset=ptr.offset - SIZEOF_ENTRY)
-                self._entries.append(entry)
-                key = entry.key
+        Returns:
+          int: the number of entries.
+        '''
+        suffixes = self._suffixes
+        if suffixes is None:
+            self._load_entries()
+            suffixes = self._suffixes
+        return len(suffixes)
+
+    def get_keys(self):
+        '''
+        fetch the keys of the entries from this page in order,
+         without creating the entry objects.
+        the keys are reconstructed on each call, and not retained by the page.
+
+        Returns:
+          List[bytes]: the keys.
+        '''
+        self._load_entries()
+        prefix = self._prefix
+        return [prefix + suffix for suffix in self._suffixes]
 
     def get_entries(self):
         '''
@@ -268,36 +876,57 @@ class Page(vstruct.VStruct):
           - value
 
         Yields:
-          Union[BranchEntry, LeafEntry]: the b-tree entries from this page.
+          PageEntry: the b-tree entries from this page.
         '''
         self._load_entries()
-        for entry in self._entries:
-            yield entry
+        for i in range(len(self._suffixes)):
+            yield self.get_entry(i)
+
+    def bisect(self, key, lo=0):
+        '''
+        find the index of the first entry whose key is not less than the given key,
+         via binary search.
+        this is `entry_count` when all the keys are less than the given key.
+
+        the prefix shared by the keys on the page is compared just once,
+         and then only the key suffixes are searched.
+
+        Args:
+          key (bytes): the key for which to search.
+          lo (int): the index from which to begin the search. default: 0.
+
+        Returns:
+          int: the entry index.
+        '''
+        suffixes = self._suffixes
+        if suffixes is None:
+            self._load_entries()
+            suffixes = self._suffixes
+        key = bytes(key)
+        prefix = self._prefix
+
+        if prefix:
+            if not key.startswith(prefix):
+                # the key differs within the shared prefix,
+                #  so it sorts either before or after every key on the page.
+                return lo if key < prefix else len(suffixes)
+            key = key[len(prefix):]
+
+        return bisect.bisect_left(suffixes, key, lo)
 
     def find_index(self, key):
         '''
         find the index of the exact match, or in the case of a branch node,
          the index of the least-greater entry.
         '''
-        # implementation note:
-        #  suprisingly, using a binary search here does not substantially improve performance.
-        #  this is probably the the dominating operations are parsing and allocating entries.
-        #  the linear scan below is simpler to read, so we'll use that until it becomes an issue.
-        if self.is_leaf():
-            for i, entry in enumerate(self.get_entries()):
-                if key == bytes(entry.key):
-                    return i
-        else:
-            for i, entry in enumerate(self.get_entries()):
-                entry_key = bytes(entry.key)
-                if key == entry_key:
-                    return i
-                elif key < entry_key:
-                    # this is the least-greater entry
-                    return i
-                else:
-                    continue
-        raise KeyError(key)
+        key = bytes(key)
+        i = self.bisect(key)
+        if i == len(self._suffixes):
+            raise KeyError(key)
+        # compare the key first, as `.is_leaf()` reads a vstruct field, which is relatively slow.
+        if self.get_key(i) != key and self.is_leaf():
+            raise KeyError(key)
+        return i
 
     def get_entry(self, entry_number):
         '''
@@ -307,15 +936,49 @@ class Page(vstruct.VStruct):
           entry_number (int): the entry index.
 
         Returns:
-          Union[BranchEntry, LeafEntry]: the b-tree entry.
+          PageEntry: the b-tree entry.
 
         Raises:
           KeyError: if the entry number is not in the range of entries.
         '''
-        self._load_entries()
-        if entry_number >= len(self._entries):
+        suffixes = self._suffixes
+        if suffixes is None:
+            self._load_entries()
+            suffixes = self._suffixes
+        if entry_number < 0 or entry_number >= len(suffixes):
             raise KeyError(entry_number)
-        return self._entries[entry_number]
+
+        offset = self._value_offsets[entry_number]
+        value = self._view[offset:offset + self._value_lengths[entry_number]]
+        if self._pages:
+            page = self._pages[entry_number]
+        else:
+            page = None
+        return PageEntry(self._prefix + suffixes[entry_number], value, page)
+
+    def get_used_size(self):
+        '''
+        compute the number of bytes of the page used by the header, the entry table, and the entries.
+        the remainder of the page is free space.
+
+        Returns:
+          int: the number of bytes used.
+        '''
+        self._load_entries()
+        buf = self.contents
+        count = len(self._suffixes)
+        is_leaf = self.is_leaf()
+
+        # the page header is the same size as an entry pointer.
+        size = SIZEOF_ENTRY + count * SIZEOF_ENTRY
+        for i in range(count):
+            if is_leaf:
+                _, _, offset = LEAF_ENTRY_POINTER.unpack_from(buf, i * SIZEOF_ENTRY)
+            else:
+                _, offset = BRANCH_ENTRY_POINTER.unpack_from(buf, i * SIZEOF_ENTRY)
+            # from the key length field through the end of the value.
+            size += self._value_offsets[i] + self._value_lengths[i] - (offset - SIZEOF_ENTRY)
+        return size
 
     def validate(self):
         last = None
@@ -397,50 +1060,51 @@ class PrefixMatchStrategy(FindStrategy):
     def _find(self, cursor, page_number, key):
         page = cursor.index.get_page(page_number)
         cursor.path.append(page)
+        depth = len(cursor.path)
+
+        # any key that starts with the given key sorts at or after it,
+        #  so the first candidate is the least entry not less than the given key.
+        i = page.bisect(key)
+        count = page.get_entry_count()
 
         if page.is_leaf():
-            for i, entry in enumerate(page.get_entries()):
-                entry_key = bytes(entry.key)
-                if entry_key.startswith(key):
-                    cursor.entry = entry
-                    cursor.entry_number = i
-                    return
-                elif entry_key > key:
-                    # as soon as we reach greater entries, we'll never match
-                    break
+            if i < count and page.get_key(i).startswith(key):
+                cursor.entry = page.get_entry(i)
+                cursor.entry_number = i
+                return
 
             # pop the final path entry, cause we know its not here
             cursor.path = cursor.path[:-1]
             raise KeyError(key)
         else:  # is branch node
-            next_page = page.ppointer
-            for i, entry in enumerate(page.get_entries()):
-                entry_key = bytes(entry.key)
-                if entry_key == key:
-                    cursor.entry = entry
+            candidate = page.get_key(i) if i < count else None
+            if candidate == key:
+                cursor.entry = page.get_entry(i)
+                cursor.entry_number = i
+                return
+
+            # the sub-page just prior to the candidate contains the keys between
+            #  the prior entry and the candidate, so any better match is there.
+            if i == 0:
+                next_page = page.ppointer
+            else:
+                next_page = page.get_entry(i - 1).page
+
+            if candidate is not None and candidate.startswith(key):
+                # this is obviously a good match; however,
+                # there may have been an exact match in the sub-page just prior,
+                # so we need to first check that first.
+                try:
+                    return self._find(cursor, next_page, key)
+                except KeyError:
+                    cursor.path = cursor.path[:depth]
+                    cursor.entry = page.get_entry(i)
                     cursor.entry_number = i
                     return
-                elif entry_key.startswith(key):
-                    # this is obviously a good match; however,
-                    # there may have been an exact match in the sub-page just prior,
-                    # so we need to first check that first.
-                    try:
-                        return self._find(cursor, next_page, key)
-                    except KeyError:
-                        cursor.entry = entry
-                        cursor.entry_number = i
-                        return
-                elif entry_key > key:
-                    # as soon as we reach greater entries, we'll never match.
-                    # so we need to check the sub-page just prior.
-                    return self._find(cursor, next_page, key)
-                else:
-                    next_page = entry.page
-
-            # since we haven't found a matching entry, but we know our matches must be somewhere,
-            # we need to search the final sub-page, which contains the greatest entries.
-            last_entry = page.get_entry(page.entry_count - 1)
-            return self._find(cursor, last_entry.page, key)
+            else:
+                # either the candidate is greater and won't match,
+                #  or all the entries are less than the key and matches must be in the final sub-page.
+                return self._find(cursor, next_page, key)
 
     def find(self, cursor, key):
         self._find(cursor, cursor.index.root_page, key)
@@ -457,55 +1121,43 @@ class RoundDownMatchStrategy(FindStrategy):
     def _find(self, cursor, page_number, key):
         page = cursor.index.get_page(page_number)
         cursor.path.append(page)
+        depth = len(cursor.path)
 
-        if page.is_leaf():
-            for i, entry in enumerate(page.get_entries()):
-                entry_key = bytes(entry.key)
+        i = page.bisect(key)
 
-                if entry_key == key:
-                    cursor.entry = entry
-                    cursor.entry_number = i
-                    return
-                elif entry_key > key:
-                    if i == 0:
-                        # need to handle this at the branch node, or
-                        #  if this is the only node, bubbles up.
-                        raise KeyError(key)
-                    else:
-                        cursor.entry = page.get_entry(i - 1)
-                        cursor.entry_number = i - 1
-            entry_number = page.entry_count - 1
-            cursor.entry = page.get_entry(entry_number)
-            cursor.entry_number = entry_number
-        else:  # is branch node
-            for i, entry in enumerate(page.get_entries()):
-                entry_key = bytes(entry.key)
-                if entry_key == key:
-                    cursor.entry = entry
-                    cursor.entry_number = i
-                    return
-                elif entry_key > key:
-                    if i == 0:
-                        # may raise KeyError, and its meant to bubble all the
-                        # way up.
-                        return self._find(cursor, page.ppointer, key)
-                    else:
-                        try:
-                            entry = page.get_entry(i - 1)
-                            return self._find(cursor, entry.page, key)
-                        except KeyError:
-                            cursor.entry = entry
-                            cursor.entry_number = i - 1
-                            return
-                else:
-                    continue
+        if i < page.get_entry_count() and page.get_key(i) == key:
+            cursor.entry = page.get_entry(i)
+            cursor.entry_number = i
+            return
 
+        # entry i is the least-greater entry, so entry i - 1 is the greatest lesser entry.
+        if page.is_leaf():
+            if i == 0:
+                # need to handle this at the branch node, or
+                #  if this is the only node, bubbles up.
+                cursor.path = cursor.path[:-1]
+                raise KeyError(key)
+            cursor.entry = page.get_entry(i - 1)
+            cursor.entry_number = i - 1
+        else:  # is branch node
+            if i == 0:
+                # may raise KeyError, and its meant to bubble all the
+                # way up.
+                try:
+                    return self._find(cursor, page.ppointer, key)
+                except KeyError:
+                    cursor.path = cursor.path[:-1]
+                    raise
+
+            # the greatest lesser entry may be in the sub-page between entries i - 1 and i,
+            #  and otherwise, its entry i - 1.
+            entry = page.get_entry(i - 1)
             try:
-                entry = page.get_entry(page.entry_count - 1)
                 return self._find(cursor, entry.page, key)
             except KeyError:
+                cursor.path = cursor.path[:depth]
                 cursor.entry = entry
-                cursor.entry_number = page.entry_count - 1
+                cursor.entry_number = i - 1
                 return
 
     def find(self, cursor, key):
@@ -568,6 +1220,10 @@ class Cursor(object):
     '''
     represents a particular location in the b-tree.
     can be navigated "forward" and "backwards".
+
+    the cursor remembers which entry it followed at each level of its path,
+     so stepping across page boundaries is a pointer step rather than a search,
+     and a full traversal is linear in the number of entries.
     '''
 
     def __init__(self, index):
@@ -578,50 +1234,107 @@ class Cursor(object):
         # this point
         self.path = []
 
+        # for each page in the path but the last, the index of the least-greater entry
+        #  relative to the keys in the child page at the next level.
+        # that is, the child is `.ppointer` for slot 0, and `get_entry(slot - 1).page` otherwise.
+        # the find strategies don't populate this,
+        #  so levels are filled in on demand, and then maintained as the cursor moves.
+        self._slots = []
+
         # populated once found
         self.entry = None
 
         self.entry_number = None
 
+    def _get_slot(self, level):
+        '''
+        fetch the slot for the page at the given level of the path.
+        '''
+        while len(self._slots) < len(self.path) - 1:
+            self._slots.append(None)
+
+        slot = self._slots[level]
+        if slot is None:
+            # any key from the subtree will do; the current entry is in it.
+            page = self.path[level]
+            try:
+                slot = page.find_index(self.entry.key)
+            except KeyError:
+                slot = page.entry_count
+            self._slots[level] = slot
+        return slot
+
+    def _descend(self, page_number, slot, is_forward):
+        '''
+        follow the min-edge (or max-edge) down from the current page to a leaf,
+         and take the min (or max) entry.
+
+        Args:
+          page_number (int): the child page to traverse into.
+          slot (int): the slot of the child page in the current page.
+          is_forward (bool): take the min-edge, otherwise the max-edge.
+        '''
+        del self._slots[len(self.path) - 1:]
+        while len(self._slots) < len(self.path) - 1:
+            self._slots.append(None)
+        self._slots.append(slot)
+
+        page = self.index.get_page(page_number)
+        while not page.is_leaf():
+            self.path.append(page)
+            if is_forward:
+                self._slots.append(0)
+                page = self.index.get_page(page.ppointer)
+            else:
+                self._slots.append(page.entry_count)
+                page = self.index.get_page(page.get_entry(page.entry_count - 1).page)
+
+        self.path.append(page)
+        if is_forward:
+            self.entry_number = 0
+        else:
+            self.entry_number = page.entry_count - 1
+        self.entry = page.get_entry(self.entry_number)
+
+    def _ascend(self, level, entry_number):
+        '''
+        move to the given entry of the page at the given level of the path.
+        '''
+        del self.path[level + 1:]
+        del self._slots[level:]
+        self.entry = self.path[level].get_entry(entry_number)
+        self.entry_number = entry_number
+
     def next(self):
         '''
         traverse to the next entry.
         updates this current cursor instance.
 
         Raises:
-          IndexError: if the entry does not exist. the cursor is in an unknown state afterwards.
+          IndexError: if the entry does not exist. the cursor is unchanged.
         '''
+        if self.index.profiler is not None:
+            self.index.profiler.steps += 1
+
         current_page = self.path[-1]
         if current_page.is_leaf():
             if self.entry_number == current_page.entry_count - 1:
                 # complex case: have to traverse up and then around.
                 # we are at the end of a leaf node. so we need to go to the parent and find the next entry.
                 # we may have to go up multiple parents.
-                start_key = self.entry.key
-
+                level = len(self.path) - 1
                 while True:
-                    # pop the current node off the path
-                    if len(self.path) <= 1:
+                    if level == 0:
                         raise IndexError()
-                    self.path = self.path[:-1]
+                    level -= 1
 
-                    current_page = self.path[-1]
-                    try:
-                        entry_number = current_page.find_index(start_key)
-                    except KeyError:
-                        # not found, becaues its too big for this node.
-                        # so we need to go higher.
-                        continue
-                    else:
-                        # found a valid entry, so lets process it.
+                    # the least-greater entry relative to the page from which we just came.
+                    slot = self._get_slot(level)
+                    if slot < self.path[level].entry_count:
                         break
+                    # otherwise, the child page was the greatest, so we need to go higher.
 
-                # entry_number now points to the least-greater entry relative to start key.
-                # this should be the entry that points to the page from which we just came.
-                # we'll want to return the key from this entry.
-
-                self.entry = current_page.get_entry(entry_number)
-                self.entry_number = entry_number
+                self._ascend(level, slot)
                 return
 
             else:  # is inner entry.
@@ -633,16 +1346,8 @@ class Cursor(object):
                 self.entry_number = next_entry_number
                 return
         else:  # is branch node.
-
             # follow the min-edge down to a leaf, and take the min entry.
-            next_page = self.index.get_page(self.entry.page)
-            while not next_page.is_leaf():
-                self.path.append(next_page)
-                next_page = self.index.get_page(next_page.ppointer)
-
-            self.path.append(next_page)
-            self.entry = next_page.get_entry(0)
-            self.entry_number = 0
+            self._descend(self.entry.page, self.entry_number + 1, True)
             return
 
     def prev(self):
@@ -651,8 +1356,11 @@ class Cursor(object):
         updates this current cursor instance.
 
         Raises:
-          IndexError: if the entry does not exist. the cursor is in an unknown state afterwards.
+          IndexError: if the entry does not exist. the cursor is unchanged.
         '''
+        if self.index.profiler is not None:
+            self.index.profiler.steps += 1
+
         current_page = self.path[-1]
         if current_page.is_leaf():
             if self.entry_number == 0:
@@ -660,34 +1368,20 @@ class Cursor(object):
                 # we are at the beginning of a leaf node.
                 # so we need to go to the parent and find the prev entry.
                 # we may have to go up multiple parents.
-                start_key = self.entry.key
-
+                level = len(self.path) - 1
                 while True:
-                    # pop the current node off the path
-                    if len(self.path) <= 1:
+                    if level == 0:
                         raise IndexError()
-                    self.path = self.path[:-1]
-
-                    current_page = self.path[-1]
-                    try:
-                        entry_number = current_page.find_index(start_key)
-                    except KeyError:
-                        entry_number = current_page.entry_count
+                    level -= 1
 
-                    if entry_number == 0:
-                        # not found, becaues its too small for this node.
-                        # so we need to go higher.
-                        continue
-                    else:
+                    # the entry just smaller than the page from which we just came
+                    #  is the one before the least-greater entry.
+                    slot = self._get_slot(level)
+                    if slot > 0:
                         break
+                    # otherwise, the child page was the smallest, so we need to go higher.
 
-                # entry_number now points to the least-greater entry relative to start key.
-                # this should be the entry that points to the page from which we just came.
-                # we'll want to return the key from the entry that is just
-                # smaller than this one.
-
-                self.entry = current_page.get_entry(entry_number - 1)
-                self.entry_number = entry_number - 1
+                self._ascend(level, slot - 1)
                 return
 
             else:  # is inner entry.
@@ -700,22 +1394,12 @@ class Cursor(object):
                 self.entry_number = next_entry_number
                 return
         else:  # is branch node.
-
             # follow the max-edge down to a leaf, and take the max entry.
-            current_page = self.path[-1]
             if self.entry_number == 0:
                 next_page_number = current_page.ppointer
             else:
                 next_page_number = current_page.get_entry(self.entry_number - 1).page
-
-            next_page = self.index.get_page(next_page_number)
-            while not next_page.is_leaf():
-                self.path.append(next_page)
-                next_page = self.index.get_page(next_page.get_entry(next_page.entry_count - 1).page)
-
-            self.path.append(next_page)
-            self.entry = next_page.get_entry(next_page.entry_count - 1)
-            self.entry_number = next_page.entry_count - 1
+            self._descend(next_page_number, self.entry_number, False)
             return
 
     @property
@@ -727,49 +1411,665 @@ class Cursor(object):
         return self.entry.value
 
 
-class ID0(vstruct.VStruct):
+def get_key_range(start_key=None, end_key=None, prefix=None):
     '''
-    a b-tree index.
-    keys and values are arbitrary byte strings.
+    combine the given bounds and prefix into a single range of keys, `start_key <= key < end_key`.
 
-    use `.find()` to identify a matching entry, and use the resulting cursor
-     instance to access the value, or traverse to less/greater entries.
+    the keys that start with the prefix are at least the prefix, and less than the prefix "plus one".
+    when the prefix is all 0xFF, there's no such key, so there's no upper bound.
+
+    Returns:
+      Tuple[Optional[bytes], Optional[bytes]]: the start and end keys, either may be None.
     '''
+    if start_key is not None:
+        start_key = bytes(start_key)
+    if end_key is not None:
+        end_key = bytes(end_key)
 
-    def __init__(self, buf, wordsize):
-        vstruct.VStruct.__init__(self)
-        self.buf = idb.memview(buf)
-        self.wordsize = wordsize
+    if prefix is not None:
+        prefix = bytes(prefix)
+        if start_key is None or start_key < prefix:
+            start_key = prefix
 
-        self.next_free_offset = v_uint32()
-        self.page_size = v_uint16()
-        self.root_page = v_uint32()
-        self.record_count = v_uint32()
-        self.page_count = v_uint32()
-        self.unk12 = v_uint8()
-        self.signature = v_bytes(size=0x09)
+        stripped = prefix.rstrip(b'\xFF')
+        if stripped:
+            prefix_end = stripped[:-1] + six.int2byte(six.indexbytes(stripped, len(stripped) - 1) + 1)
+            if end_key is None or end_key > prefix_end:
+                end_key = prefix_end
 
-        self._page_cache = {}
+    return start_key, end_key
 
-    def get_page_buffer(self, page_number):
-        if page_number < 1:
-            logger.warning('unexpected page number requested: %d', page_number)
 
-        offset = self.page_size * page_number
-        return self.buf[offset:offset + self.page_size]
+class PageCache(object):
+    '''
+    bounded cache of parsed B-tree pages.
 
-    def get_page(self, page_number):
-        page = self._page_cache.get(page_number, None)
-        if page is not None:
-            return page
+    leaf pages are evicted in least-recently used order once there are more than `max_pages`.
+    branch pages (and the root page) are pinned and never evicted:
+     every lookup passes through them, and there are few of them relative to the leaves.
+    so, memory usage is roughly `max_pages * page_size`, plus the branch pages.
 
-        buf = self.get_page_buffer(page_number)
-        page = Page(self.page_size, page_number)
+    pages are not invalidated when they're evicted,
+     so existing cursors continue to work.
+
+    Args:
+      max_pages (Optional[int]): the maximum number of unpinned pages to keep around,
+        or None to keep every page.
+
+    Example::
+
+        db.id0.page_cache.resize(256)
+        ...
+        print(db.id0.page_cache.hits, db.id0.page_cache.misses)
+    '''
+    def __init__(self, max_pages=None):
+        super(PageCache, self).__init__()
+        self.max_pages = max_pages
+        # map from page number to pinned page.
+        self._pinned = {}
+        # map from page number to page, in least-recently used order.
+        self._pages = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, page_number):
+        '''
+        fetch the cached page with the given number, or None if its not cached.
+        '''
+        page = self._pinned.get(page_number)
+        if page is None:
+            page = self._pages.pop(page_number, None)
+            if page is not None:
+                self._pages[page_number] = page
+
+        if page is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return page
+
+    def put(self, page, pin=False):
+        '''
+        add the given page to the cache, evicting the least-recently used page if necessary.
+
+        Args:
+          page (Page): the page.
+          pin (bool): never evict this page.
+        '''
+        if pin:
+            self._pinned[page.page_number] = page
+            return
+
+        self._pages[page.page_number] = page
+        self._evict()
+
+    def resize(self, max_pages):
+        '''
+        change the maximum number of unpinned pages, evicting pages if necessary.
+        '''
+        self.max_pages = max_pages
+        self._evict()
+
+    def _evict(self):
+        if self.max_pages is None:
+            return
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._pinned.clear()
+        self._pages.clear()
+
+    def __len__(self):
+        return len(self._pinned) + len(self._pages)
+
+
+class AccessProfile(object):
+    '''
+    counters of the work done to answer queries against a b-tree, see `ID0.profile()`.
+
+    Attributes:
+      queries (int): the number of searches from the root of the tree,
+        by `.find()`, `.find_many()`, and at the start of `.scan()`.
+      negative_hits (int): the number of exact match lookups for missing keys
+        answered without searching the tree.
+      page_hits (int): the number of page accesses answered from the page cache.
+      page_misses (int): the number of page accesses that read and parsed the page.
+      entries_decoded (int): the number of entries in the pages that were parsed.
+      steps (int): the number of calls to `Cursor.next()` and `Cursor.prev()`.
+    '''
+    def __init__(self):
+        super(AccessProfile, self).__init__()
+        self.queries = 0
+        self.negative_hits = 0
+        self.page_hits = 0
+        self.page_misses = 0
+        self.entries_decoded = 0
+        self.steps = 0
+
+    @property
+    def pages(self):
+        '''
+        the number of page accesses.
+        '''
+        return self.page_hits + self.page_misses
+
+    def __repr__(self):
+        fmt = ('AccessProfile(queries=%d, negative_hits=%d, page_hits=%d, page_misses=%d, '
+               'entries_decoded=%d, steps=%d)')
+        return fmt % (self.queries, self.negative_hits, self.page_hits,
+                      self.page_misses, self.entries_decoded, self.steps)
+
+
+# summary of a collection of sizes or counts.
+Distribution = namedtuple('Distribution', ['count', 'min', 'mean', 'median', 'p90', 'max'])
+
+
+def get_distribution(values):
+    '''
+    summarize the given numbers.
+
+    Args:
+      values (Iterable[Union[int, float]]): the numbers.
+
+    Returns:
+      Distribution: the summary. the fields are all zero when there are no numbers.
+    '''
+    values = sorted(values)
+    if not values:
+        return Distribution(0, 0, 0, 0, 0, 0)
+    return Distribution(len(values),
+                        values[0],
+                        sum(values) / float(len(values)),
+                        values[len(values) // 2],
+                        values[min(len(values) - 1, int(len(values) * 0.9))],
+                        values[-1])
+
+
+# the number of pages and entries at one level of a b-tree, from the root.
+LevelStatistics = namedtuple('LevelStatistics', ['pages', 'entries'])
+
+# the structure of a b-tree, see `ID0.get_statistics()`.
+#
+#   page_size (int): the size of each page, in bytes.
+#   page_count (int): the number of pages in the file, including unused pages.
+#   depth (int): the number of levels, from the root to the leaves.
+#   branch_pages (int): the number of branch pages, including the root unless its a leaf.
+#   leaf_pages (int): the number of leaf pages.
+#   entries (int): the number of entries across all pages.
+#   levels (List[LevelStatistics]): the pages and entries at each level, from the root.
+#   entries_per_page (Distribution): the number of entries in each page.
+#   fill_factor (Distribution): the fraction of each page used by the header, entry table, and entries.
+#   key_sizes (Distribution): the length of each key, after prefix decompression.
+#   value_sizes (Distribution): the length of each value.
+BTreeStatistics = namedtuple('BTreeStatistics', ['page_size', 'page_count', 'depth',
+                                                 'branch_pages', 'leaf_pages', 'entries', 'levels',
+                                                 'entries_per_page', 'fill_factor',
+                                                 'key_sizes', 'value_sizes'])
+
+
+class BloomFilter(object):
+    '''
+    a probabilistic set of keys.
+    membership tests have no false negatives,
+     and false positives at roughly the given rate.
+
+    used by `ID0.find` to answer lookups for missing keys without searching the tree.
+
+    Args:
+      capacity (int): the number of keys that will be added.
+      error_rate (float): the acceptable rate of false positives.
+
+    Example::
+
+        bf = BloomFilter(len(keys))
+        for key in keys:
+            bf.add(key)
+        assert keys[0] in bf
+    '''
+    MAGIC = b'IDBBLOOM'
+    # magic, fingerprint, bit count, hash count.
+    HEADER = struct.Struct('<8s32sQI')
+
+    def __init__(self, capacity, error_rate=0.01):
+        super(BloomFilter, self).__init__()
+        capacity = max(1, capacity)
+        # the optimal size and number of hashes, per:
+        #  https://en.wikipedia.org/wiki/Bloom_filter#Optimal_number_of_hash_functions
+        self.bit_count = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.hash_count = max(1, int(round(self.bit_count / capacity * math.log(2))))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+        # identifies the data from which the filter was built, see `.save()`.
+        self.fingerprint = b'\x00' * 32
+
+    def _get_offsets(self, key):
+        # double hashing: the i-th hash is h1 + i * h2.
+        h1, h2 = struct.unpack_from('<QQ', hashlib.md5(key).digest())
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.bit_count
+
+    def add(self, key):
+        bits = self.bits
+        for offset in self._get_offsets(bytes(key)):
+            bits[offset >> 3] |= 1 << (offset & 7)
+
+    def __contains__(self, key):
+        bits = self.bits
+        for offset in self._get_offsets(bytes(key)):
+            if not bits[offset >> 3] & (1 << (offset & 7)):
+                return False
+        return True
+
+    def save(self, path):
+        '''
+        write the filter to the given path, see `atomic_write`.
+        '''
+        with atomic_write(path) as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.fingerprint, self.bit_count, self.hash_count))
+            f.write(bytes(self.bits))
+
+    @classmethod
+    def load(cls, path):
+        '''
+        read a filter written by `.save()`.
+
+        Raises:
+          ValueError: if the file is not a valid filter.
+        '''
+        with open(path, 'rb') as f:
+            buf = f.read()
+
+        if len(buf) < cls.HEADER.size:
+            raise ValueError('truncated bloom filter')
+        magic, fingerprint, bit_count, hash_count = cls.HEADER.unpack_from(buf)
+        if magic != cls.MAGIC:
+            raise ValueError('bad bloom filter signature')
+        bits = bytearray(buf[cls.HEADER.size:])
+        if len(bits) != (bit_count + 7) // 8:
+            raise ValueError('truncated bloom filter')
+
+        bf = cls.__new__(cls)
+        bf.bit_count = bit_count
+        bf.hash_count = hash_count
+        bf.bits = bits
+        bf.fingerprint = fingerprint
+        return bf
+
+
+class FlatIndex(object):
+    '''
+    a flattened, sorted snapshot of the entries of an `ID0` index.
+
+    the keys are stored in one blob with a table of offsets, so lookups are a binary search
+     over the table, rather than a descent through the pages.
+    the values are not copied: each is stored as a span in the pages of the original index.
+
+    the snapshot is a flat buffer, so it can be saved next to the database
+     and reopened via mmap, which avoids walking the tree again.
+    the tables are decoded on access, so opening a saved snapshot costs nothing up front.
+
+    use `ID0.flatten()` to construct one.
+
+    Example::
+
+        flat = db.id0.flatten('kernel32.idb.flat')
+        value = flat.find(key)
+        for key, value in flat.scan(prefix=b'N'):
+            print(key)
+    '''
+    MAGIC = b'IDBFLAT\x00'
+    # magic, fingerprint, entry count, size of the key blob.
+    HEADER = struct.Struct('<8s32sII')
+    # a pair of adjacent key offsets, which bound a key in the blob.
+    KEY_SPAN = struct.Struct('<II')
+    # the page number containing a value.
+    VALUE_PAGE = struct.Struct('<I')
+    # the offset of a value within its page, and its length.
+    VALUE_SPAN = struct.Struct('<HH')
+    # the number of entries between the keys sampled into memory to narrow a search.
+    FENCE_STRIDE = 0x20
+
+    def __init__(self, index, buf):
+        '''
+        Args:
+          index (ID0): the index that contains the values.
+          buf (bytes): the snapshot, as produced by `.build()`.
+        '''
+        super(FlatIndex, self).__init__()
+        self.index = index
+        self.buf = buf
+
+        if len(buf) < self.HEADER.size:
+            raise ValueError('truncated snapshot')
+        magic, self.fingerprint, self.count, keys_size = self.HEADER.unpack_from(buf)
+        if magic != self.MAGIC:
+            raise ValueError('bad snapshot signature')
+
+        # offsets of the tables, see `.build()`.
+        self._key_offsets = self.HEADER.size
+        self._value_pages = self._key_offsets + 4 * (self.count + 1)
+        self._value_spans = self._value_pages + 4 * self.count
+        self._keys = self._value_spans + 4 * self.count
+        if len(buf) != self._keys + keys_size:
+            raise ValueError('truncated snapshot')
+
+        # every `FENCE_STRIDE`-th key, populated on the first search.
+        self._fence = None
+
+    @classmethod
+    def build(cls, index):
+        '''
+        walk the given index, in order, and produce the flat snapshot.
+
+        layout::
+
+            header
+            key offsets   (count + 1) * uint32, relative to the key blob
+            value pages   count * uint32
+            value spans   count * (uint16 offset within page, uint16 length)
+            key blob
+
+        Returns:
+          FlatIndex: the snapshot.
+        '''
+        keys = []
+        key_offsets = [0]
+        value_pages = []
+        value_spans = []
+
+        def walk(page_number):
+            page = index.get_page(page_number)
+            page_keys = page.get_keys()
+            # the offset of the contents within the page, after the page header.
+            base = SIZEOF_ENTRY
+            for i, key in enumerate(page_keys):
+                if not page.is_leaf():
+                    # the child page with keys less than this entry.
+                    walk(page.ppointer if i == 0 else page._pages[i - 1])
+
+                keys.append(key)
+                key_offsets.append(key_offsets[-1] + len(key))
+                value_pages.append(page_number)
+                value_spans.append(base + page._value_offsets[i])
+                value_spans.append(page._value_lengths[i])
+
+            if not page.is_leaf() and page_keys:
+                walk(page._pages[len(page_keys) - 1])
+
+        walk(index.root_page)
+
+        count = len(keys)
+        blob = b''.join(keys)
+        if len(blob) > 0xFFFFFFFF:
+            raise ValueError('index too large to flatten')
+
+        buf = b''.join([
+            cls.HEADER.pack(cls.MAGIC, index.get_fingerprint(), count, len(blob)),
+            struct.pack('<%dI' % (count + 1), *key_offsets),
+            struct.pack('<%dI' % (count), *value_pages),
+            struct.pack('<%dH' % (2 * count), *value_spans),
+            blob,
+        ])
+        return cls(index, buf)
+
+    def save(self, path):
+        '''
+        write the snapshot to the given path, see `atomic_write`.
+        '''
+        with atomic_write(path) as f:
+            f.write(self.buf)
+
+    @classmethod
+    def load(cls, index, path):
+        '''
+        open a snapshot written by `.save()`, via mmap.
+
+        Raises:
+          ValueError: if the file is not a valid snapshot of the given index.
+        '''
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise ValueError('truncated snapshot')
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        flat = cls(index, mm)
+        if flat.fingerprint != index.get_fingerprint():
+            raise ValueError('snapshot does not match index')
+        return flat
+
+    def __len__(self):
+        return self.count
+
+    def get_key(self, entry_number):
+        '''
+        fetch the key of the entry at the given index.
+        '''
+        if entry_number < 0 or entry_number >= self.count:
+            raise KeyError(entry_number)
+        start, end = self.KEY_SPAN.unpack_from(self.buf, self._key_offsets + 4 * entry_number)
+        return bytes(self.buf[self._keys + start:self._keys + end])
+
+    def get_value(self, entry_number):
+        '''
+        fetch the value of the entry at the given index, from the original index.
+        '''
+        if entry_number < 0 or entry_number >= self.count:
+            raise KeyError(entry_number)
+        page_number, = self.VALUE_PAGE.unpack_from(self.buf, self._value_pages + 4 * entry_number)
+        offset, length = self.VALUE_SPAN.unpack_from(self.buf, self._value_spans + 4 * entry_number)
+        start = page_number * self.index.page_size + offset
+        return self.index.buf[start:start + length]
+
+    def bisect(self, key):
+        '''
+        find the index of the first entry whose key is not less than the given key.
+        this is `len(self)` when all the keys are less than the given key.
+        '''
+        key = bytes(key)
+        if self._fence is None:
+            self._fence = [self.get_key(i) for i in range(0, self.count, self.FENCE_STRIDE)]
+
+        # narrow the search using the sampled keys, which bound the result:
+        #  fence[j - 1] <= key < fence[j]
+        j = bisect.bisect_right(self._fence, key)
+        if j == 0:
+            return 0
+        lo = (j - 1) * self.FENCE_STRIDE
+        hi = min(j * self.FENCE_STRIDE, self.count)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.get_key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, key):
+        '''
+        fetch the value of the entry with exactly the given key.
+
+        Raises:
+          KeyError: if the key is not found.
+        '''
+        key = bytes(key)
+        i = self.bisect(key)
+        if i == self.count or self.get_key(i) != key:
+            raise KeyError(key)
+        return self.get_value(i)
+
+    def scan(self, start_key=None, end_key=None, prefix=None, reverse=False):
+        '''
+        generate the entries within the given range of keys, in order.
+        see `ID0.scan()`.
+
+        Yields:
+          Tuple[bytes, bytes]: the key and value of each entry.
+        '''
+        start_key, end_key = get_key_range(start_key, end_key, prefix)
+        start = 0 if start_key is None else self.bisect(start_key)
+        end = self.count if end_key is None else self.bisect(end_key)
+
+        if reverse:
+            indices = range(end - 1, start - 1, -1)
+        else:
+            indices = range(start, end)
+        for i in indices:
+            yield self.get_key(i), self.get_value(i)
+
+
+class ID0(vstruct.VStruct):
+    '''
+    a b-tree index.
+    keys and values are arbitrary byte strings.
+
+    use `.find()` to identify a matching entry, and use the resulting cursor
+     instance to access the value, or traverse to less/greater entries.
+
+    parsed pages are kept in `.page_cache`, which is bounded to `PAGE_CACHE_SIZE` leaf pages.
+
+    exact match lookups for missing keys are answered without searching the tree
+     when the key was recently missed (up to `NEGATIVE_CACHE_SIZE` keys),
+     or when the key is not in the bloom filter, see `.load_bloom_filter()`.
+
+    to see how much work queries take, use `.profile()`,
+     and for a summary of the shape of the tree, use `.get_statistics()`.
+    '''
+    # the default maximum number of leaf pages to keep around, 8MB for 8kB pages.
+    PAGE_CACHE_SIZE = 0x400
+    # the maximum number of missed keys to remember.
+    NEGATIVE_CACHE_SIZE = 0x1000
+
+    def __init__(self, buf, wordsize):
+        vstruct.VStruct.__init__(self)
+        self.buf = as_view(buf)
+        self.wordsize = wordsize
+
+        self.next_free_offset = v_uint32()
+        self.page_size = v_uint16()
+        self.root_page = v_uint32()
+        self.record_count = v_uint32()
+        self.page_count = v_uint32()
+        self.unk12 = v_uint8()
+        self.signature = v_bytes(size=0x09)
+
+        self.page_cache = PageCache(self.PAGE_CACHE_SIZE)
+        # map from recently missed key to None, in least-recently used order.
+        self._misses = OrderedDict()
+        self.bloom_filter = None
+        # the active `AccessProfile`, if any, see `.profile()`.
+        self.profiler = None
+
+    def get_page_buffer(self, page_number):
+        if page_number < 1:
+            logger.warning('unexpected page number requested: %d', page_number)
+
+        offset = self.page_size * page_number
+        return self.buf[offset:offset + self.page_size]
+
+    def _parse_page(self, page_number):
+        buf = self.get_page_buffer(page_number)
+        page = Page(self.page_size, page_number)
         page.vsParse(buf)
+        return page
+
+    def get_page(self, page_number):
+        page = self.page_cache.get(page_number)
+        if page is not None:
+            if self.profiler is not None:
+                self.profiler.page_hits += 1
+            return page
 
-        self._page_cache[page_number] = page
+        page = self._parse_page(page_number)
+        if self.profiler is not None:
+            self.profiler.page_misses += 1
+            self.profiler.entries_decoded += page.entry_count
+
+        self.page_cache.put(page, pin=(page_number == self.root_page or not page.is_leaf()))
         return page
 
+    @contextlib.contextmanager
+    def profile(self):
+        '''
+        count the work done by the queries against this index, until the context exits.
+        when no profile is active, the instrumentation costs just a check of `.profiler`.
+        profiles don't nest: the innermost profile receives the counts.
+
+        Yields:
+          AccessProfile: the counters, which are updated as queries run.
+
+        Example::
+
+            with db.id0.profile() as profile:
+                db.id0.find(key)
+            print(profile.pages, profile.page_hits)
+        '''
+        previous = self.profiler
+        profiler = AccessProfile()
+        self.profiler = profiler
+        try:
+            yield profiler
+        finally:
+            self.profiler = previous
+
+    def get_statistics(self):
+        '''
+        walk the entire tree and summarize its structure.
+        this reads every page, but doesn't disturb the page cache.
+
+        Returns:
+          BTreeStatistics: the summary.
+
+        Example::
+
+            stats = db.id0.get_statistics()
+            print(stats.depth, stats.fill_factor.mean)
+        '''
+        levels = []
+        entries_per_page = []
+        fill_factors = []
+        key_sizes = []
+        value_sizes = []
+        branch_pages = 0
+        leaf_pages = 0
+
+        pending = [(self.root_page, 0)]
+        while pending:
+            page_number, level = pending.pop()
+            page = self._parse_page(page_number)
+            page._load_entries()
+            count = page.entry_count
+
+            if level == len(levels):
+                levels.append(LevelStatistics(0, 0))
+            levels[level] = LevelStatistics(levels[level].pages + 1, levels[level].entries + count)
+
+            entries_per_page.append(count)
+            fill_factors.append(page.get_used_size() / float(self.page_size))
+            key_sizes.extend(len(page._prefix) + len(suffix) for suffix in page._suffixes)
+            value_sizes.extend(page._value_lengths)
+
+            if page.is_leaf():
+                leaf_pages += 1
+            else:
+                branch_pages += 1
+                pending.append((page.ppointer, level + 1))
+                pending.extend((child, level + 1) for child in page._pages)
+
+        return BTreeStatistics(self.page_size,
+                               self.page_count,
+                               len(levels),
+                               branch_pages,
+                               leaf_pages,
+                               sum(entries_per_page),
+                               levels,
+                               get_distribution(entries_per_page),
+                               get_distribution(fill_factors),
+                               get_distribution(key_sizes),
+                               get_distribution(value_sizes))
+
     def find(self, key, strategy=EXACT_MATCH):
         '''
         Args:
@@ -785,11 +2085,121 @@ class ID0(vstruct.VStruct):
         Raises:
           KeyError: if the match failes to find a result.
         '''
+        if self.profiler is not None:
+            self.profiler.queries += 1
+
+        if strategy is not EXACT_MATCH:
+            c = Cursor(self)
+            s = strategy()
+            s.find(c, key)
+            return c
+
+        key = bytes(key)
+        if self.bloom_filter is not None and key not in self.bloom_filter:
+            if self.profiler is not None:
+                self.profiler.negative_hits += 1
+            raise KeyError(key)
+
+        if key in self._misses:
+            self._misses.pop(key)
+            self._misses[key] = None
+            if self.profiler is not None:
+                self.profiler.negative_hits += 1
+            raise KeyError(key)
+
         c = Cursor(self)
-        s = strategy()
-        s.find(c, key)
+        try:
+            EXACT_MATCH().find(c, key)
+        except KeyError:
+            self._misses[key] = None
+            while len(self._misses) > self.NEGATIVE_CACHE_SIZE:
+                self._misses.popitem(last=False)
+            raise
         return c
 
+    def _find_many(self, page_number, keys, path, slots, found):
+        '''
+        resolve the given sorted keys within the subtree rooted at the given page,
+         visiting each page at most once.
+        matches are recorded in `found` as a map from key to (path, slots, entry number).
+        '''
+        page = self.get_page(page_number)
+        path = path + [page]
+        count = page.get_entry_count()
+        is_leaf = page.is_leaf()
+
+        # list of (slot, keys) for the child pages to search, in order.
+        children = []
+        i = 0
+        for key in keys:
+            # the keys are sorted, so each search resumes from the last.
+            i = page.bisect(key, i)
+            if i < count and page.get_key(i) == key:
+                found[key] = (path, slots, i)
+            elif is_leaf:
+                # no match.
+                continue
+            elif children and children[-1][0] == i:
+                children[-1][1].append(key)
+            else:
+                children.append((i, [key]))
+
+        for slot, child_keys in children:
+            if slot == 0:
+                child_page_number = page.ppointer
+            else:
+                child_page_number = page.get_entry(slot - 1).page
+            self._find_many(child_page_number, child_keys, path, slots + [slot], found)
+
+    def find_many(self, keys):
+        '''
+        find the entries with exactly the given keys.
+
+        the keys are sorted and resolved together in a single descent of the tree,
+         so each page is visited at most once, rather than once per key.
+        this is much cheaper than `.find()` for many keys that are close together,
+         such as the netnode keys for consecutive addresses.
+
+        Args:
+          keys (Iterable[bytes]): the index keys for which to search.
+
+        Returns:
+          List[Optional[Cursor]]: for each key, in order, the cursor that points to the match,
+            or None if the key is not found.
+
+        Example::
+
+            keys = [db.key_codec.make_key(ea, 'A', 0x8) for ea in range(start, end)]
+            for ea, cursor in zip(range(start, end), db.id0.find_many(keys)):
+                if cursor is not None:
+                    print(hex(ea), idb.netnode.as_uint(cursor.value))
+        '''
+        if self.profiler is not None:
+            self.profiler.queries += 1
+
+        keys = [bytes(key) for key in keys]
+
+        found = {}
+        if keys:
+            self._find_many(self.root_page, sorted(set(keys)), [], [], found)
+
+        cursors = []
+        for key in keys:
+            match = found.get(key)
+            if match is None:
+                cursors.append(None)
+                continue
+
+            # each key gets its own cursor, since cursors are updated as they move.
+            path, slots, entry_number = match
+            cursor = Cursor(self)
+            cursor.path = list(path)
+            cursor._slots = list(slots)
+            cursor.entry_number = entry_number
+            cursor.entry = path[-1].get_entry(entry_number)
+            cursors.append(cursor)
+        return cursors
+
     def find_prefix(self, key):
         '''
         convenience shortcut for prefix match search.
@@ -814,6 +2224,232 @@ class ID0(vstruct.VStruct):
         '''
         return self.find(None, strategy=MAX_KEY)
 
+    def _seek(self, start_key, end_key, reverse):
+        '''
+        find the first entry of the given range, or None if the range is empty.
+        the range is `start_key <= key < end_key`, and either bound may be None.
+        '''
+        try:
+            if not reverse:
+                if start_key is None:
+                    cursor = self.get_min()
+                else:
+                    try:
+                        cursor = self.find(start_key, strategy=ROUND_DOWN_MATCH)
+                    except KeyError:
+                        # every key is greater than the start key.
+                        cursor = self.get_min()
+                    else:
+                        if cursor.key < start_key:
+                            cursor.next()
+            else:
+                if end_key is None:
+                    cursor = self.get_max()
+                else:
+                    cursor = self.find(end_key, strategy=ROUND_DOWN_MATCH)
+                    if cursor.key == end_key:
+                        cursor.prev()
+        except (KeyError, IndexError):
+            # empty index, or no entries in the range.
+            return None
+
+        if start_key is not None and cursor.key < start_key:
+            return None
+        if end_key is not None and cursor.key >= end_key:
+            return None
+        return cursor
+
+    def scan(self, start_key=None, end_key=None, prefix=None, reverse=False):
+        '''
+        generate the entries within the given range of keys, in order.
+        this walks from leaf to leaf, rather than searching from the root for each entry.
+
+        Args:
+          start_key (bytes): the least key to include. default: the minimum key.
+          end_key (bytes): the key at which to stop, exclusive. default: the maximum key.
+          prefix (bytes): only include keys that start with this prefix.
+          reverse (bool): generate the entries from greatest to least.
+
+        Yields:
+          Tuple[bytes, bytes]: the key and value of each entry.
+
+        Example::
+
+            for key, value in db.id0.scan(prefix=b'.\xff\x00\x00\x01S'):
+                print(key, value)
+        '''
+        start_key, end_key = get_key_range(start_key, end_key, prefix)
+        if start_key is not None and end_key is not None and start_key >= end_key:
+            return
+
+        cursor = self._seek(start_key, end_key, reverse)
+        if cursor is None:
+            return
+
+        while True:
+            page = cursor.path[-1]
+            if page.is_leaf():
+                # walk the rest of the leaf page directly, rather than stepping the cursor to each entry,
+                #  and then leave the cursor on the final entry, ready to step to the next page.
+                first = cursor.entry_number
+                if not reverse:
+                    last = page.entry_count - 1
+                    step = 1
+                else:
+                    last = 0
+                    step = -1
+
+                view = page._view
+                value_offsets = page._value_offsets
+                value_lengths = page._value_lengths
+                for i in range(first, last + step, step):
+                    key = page.get_key(i)
+                    if not reverse:
+                        if end_key is not None and key >= end_key:
+                            return
+                    else:
+                        if start_key is not None and key < start_key:
+                            return
+
+                    offset = value_offsets[i]
+                    yield key, view[offset:offset + value_lengths[i]]
+
+                if self.profiler is not None:
+                    self.profiler.steps += abs(last - first)
+                if last != first:
+                    cursor.entry = page.get_entry(last)
+                    cursor.entry_number = last
+            else:
+                key = cursor.key
+                if not reverse:
+                    if end_key is not None and key >= end_key:
+                        return
+                else:
+                    if start_key is not None and key < start_key:
+                        return
+
+                yield key, cursor.value
+
+            try:
+                if not reverse:
+                    cursor.next()
+                else:
+                    cursor.prev()
+            except IndexError:
+                return
+
+    def flatten(self, path=None):
+        '''
+        produce a flattened, sorted snapshot of this index, see `FlatIndex`.
+
+        Args:
+          path (str): if provided, open the snapshot from this path when it matches this index,
+            otherwise, build the snapshot and save it here.
+
+        Returns:
+          FlatIndex: the snapshot.
+        '''
+        if path is not None and os.path.exists(path):
+            try:
+                return FlatIndex.load(self, path)
+            except ValueError as e:
+                logger.debug('not using snapshot %s: %s', path, e)
+
+        flat = FlatIndex.build(self)
+        if path is not None:
+            flat.save(path)
+        return flat
+
+    def partition(self, count):
+        '''
+        split the key space into disjoint, ordered ranges of roughly equal size,
+         using the keys of the root page and, if necessary, the first-level branch pages.
+        only these few pages are read.
+
+        Args:
+          count (int): the desired number of ranges.
+            fewer are returned when the upper levels of the tree don't have enough keys.
+
+        Returns:
+          List[Tuple[Optional[bytes], Optional[bytes]]]: the (start_key, end_key) pairs,
+            suitable for `.scan()`. the first start key and last end key are None.
+        '''
+        root = self.get_page(self.root_page)
+        if count <= 1 or root.is_leaf():
+            return [(None, None)]
+
+        keys = root.get_keys()
+        if len(keys) < count - 1:
+            # interleave the keys of the first-level pages with the root keys, in order.
+            level = []
+            for i in range(len(keys) + 1):
+                if i == 0:
+                    child = self.get_page(root.ppointer)
+                else:
+                    level.append(keys[i - 1])
+                    child = self.get_page(root.get_entry(i - 1).page)
+                if not child.is_leaf():
+                    level.extend(child.get_keys())
+            keys = level
+
+        if len(keys) <= count - 1:
+            separators = list(keys)
+        else:
+            step = len(keys) / float(count)
+            separators = [keys[int(i * step)] for i in range(1, count)]
+
+        bounds = [None] + separators + [None]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    def get_fingerprint(self):
+        '''
+        compute a digest that identifies the contents of this index,
+         from the header and the root page.
+        the root page changes whenever the tree is restructured.
+        '''
+        h = hashlib.sha256()
+        h.update(('%d:%d:%d:%d' % (self.next_free_offset, self.root_page,
+                                   self.record_count, self.page_count)).encode('ascii'))
+        h.update(bytes(self.get_page_buffer(self.root_page)))
+        return h.digest()
+
+    def load_bloom_filter(self, path=None, error_rate=0.01):
+        '''
+        build a bloom filter of all the keys in this index, by scanning the leaves,
+         so that subsequent exact match lookups for missing keys don't search the tree.
+
+        Args:
+          path (str): if provided, load the filter from this path when it matches this index,
+            otherwise, build the filter and save it here.
+          error_rate (float): the acceptable rate of false positives.
+
+        Returns:
+          BloomFilter: the filter, which is also assigned to `.bloom_filter`.
+        '''
+        fingerprint = self.get_fingerprint()
+
+        if path is not None and os.path.exists(path):
+            try:
+                bf = BloomFilter.load(path)
+            except ValueError:
+                logger.warning('invalid bloom filter: %s', path)
+            else:
+                if bf.fingerprint == fingerprint:
+                    self.bloom_filter = bf
+                    return bf
+                logger.debug('stale bloom filter: %s', path)
+
+        bf = BloomFilter(self.record_count, error_rate=error_rate)
+        bf.fingerprint = fingerprint
+        for key, _ in self.scan():
+            bf.add(key)
+
+        if path is not None:
+            bf.save(path)
+
+        self.bloom_filter = bf
+        return bf
+
     def validate(self):
         if self.signature != b'B-tree v2':
             raise ValueError('bad signature')
@@ -868,7 +2504,7 @@ class ID1(vstruct.VStruct):
         self._segments = vstruct.VArray()
         self.segments = []
         self.padding = v_bytes()
-        self.buffer = v_bytes()
+        self.buffer = v_slice()
 
     SegmentDescriptor = namedtuple('SegmentDescriptor', ['bounds', 'offset'])
 
@@ -951,7 +2587,8 @@ class ID1(vstruct.VStruct):
         '''
         seg = self.get_segment(ea)
         offset = seg.offset + 4 * (ea - seg.bounds.start)
-        return struct.unpack_from('<I', self.buffer, offset)[0]
+        # slice rather than `unpack_from`, since the buffer may be a `LazyBuffer`.
+        return struct.unpack('<I', self.buffer[offset:offset + 4])[0]
 
     def validate(self):
         if self.signature != b'VA*\x00':
@@ -995,7 +2632,7 @@ class NAM(vstruct.VStruct):
         # so for an .i64, this is 2x the name count.
         self.name_count = v_uint32()
         self.padding = v_bytes(size=NAM.PAGE_SIZE - (6 * 4 + wordsize))
-        self.buffer = v_bytes()
+        self.buffer = v_slice()
 
     def pcb_page_count(self):
         self['buffer'].vsSetLength(self.page_count * NAM.PAGE_SIZE)
@@ -1059,23 +2696,39 @@ SECTIONS = [
 
 
 class IDB(vstruct.VStruct):
-    def __init__(self, buf):
+    '''
+    an IDA Pro database.
+
+    only the file header is parsed by `.vsParse()`.
+    the sections (`.id0`, `.id1`, `.nam`, etc.) are parsed on first access,
+     so the cost of opening a database is proportional to what is actually used.
+
+    Args:
+      buf (bytes): the contents of the database file.
+      lazy_inflate (bool): inflate zlib-packed sections on demand,
+        around the requested offsets, rather than all at once.
+      cache (SectionCache): if provided, store and fetch decompressed sections here.
+      zero_copy (bool): netnode values are returned as memoryview slices of the B-tree pages,
+        rather than copied into bytes.
+    '''
+    def __init__(self, buf, lazy_inflate=False, cache=None, zero_copy=False):
         vstruct.VStruct.__init__(self)
         # we use a memoryview since we'll take a bunch of read-only subslices.
-        self.buf = idb.memview(buf)
-
-        # list of parsed Section instances or None.
-        # the entries should line up with the SECTIONS definition.
-        self.sections = []
-
-        # these fields will be parsed from self.buf once the header is parsed.
-        # they are *not* linearly parsed during .vsParse().
-        self.id0 = None  # type: ID0
-        self.id1 = None  # type: ID1
-        self.nam = None  # type: NAM
-        self.seg = None  # type: NotImplemented
-        self.til = None  # type: TIL
-        self.id2 = None  # type: NotImplemented
+        self.buf = as_view(buf)
+        self.lazy_inflate = lazy_inflate
+        self.cache = cache
+        self.zero_copy = zero_copy
+        # map from netnode name to shared `Netnode` instance, see `idb.netnode.get_netnode()`.
+        self.netnodes = {}
+
+        # map from section index to parsed Section instance or None.
+        # the indices line up with the SECTIONS definition.
+        # populated on demand by `.get_section()`.
+        self._sections = {}
+
+        # the section fields (`.id0`, `.id1`, `.nam`, `.seg`, `.til`, `.id2`)
+        #  are *not* linearly parsed during .vsParse().
+        # they are parsed from self.buf when first accessed, see `__getattr__`.
 
         # these are the only true vstruct fields for this struct.
         self.header = FileHeader()
@@ -1083,6 +2736,8 @@ class IDB(vstruct.VStruct):
         # updated once header is parsed.
         self.wordsize = 0
         self.uint = ValueError
+        # shared by the netnodes of this database, see `idb.netnode.KeyCodec`.
+        self.key_codec = None
 
     def pcb_header(self):
         if self.header.signature == b'IDA1':
@@ -1093,40 +2748,124 @@ class IDB(vstruct.VStruct):
             self.uint = idb.netnode.uint64
         else:
             raise RuntimeError('unexpected file signature: %s' % (self.header.signature))
+        self.key_codec = idb.netnode.get_key_codec(self.wordsize)
 
-        # TODO: pass along checksum
-        for offset in self.header.offsets:
-            if offset == 0:
-                self.sections.append(None)
-                continue
+    @property
+    def sections(self):
+        '''
+        list of parsed Section instances or None.
+        the entries line up with the SECTIONS definition.
+        note: accessing this parses (and possibly decompresses) every section.
+        '''
+        return [self.get_section(i) for i in range(len(self.header.offsets))]
+
+    def get_section(self, index):
+        '''
+        fetch the raw section at the given index, parsing it if necessary.
+
+        Args:
+          index (int): the index of the section, per the SECTIONS definition.
 
-            sectionbuf = self.buf[offset:]
-            section = Section()
+        Returns:
+          Optional[Section]: the section, or None if it is not present.
+        '''
+        if index in self._sections:
+            return self._sections[index]
+
+        section = None
+        if index < len(self.header.offsets) and self.header.offsets[index] != 0:
+            if self.cache is not None:
+                inflate = functools.partial(self.cache.inflate, (index, self.header.checksums[index]))
+            elif self.lazy_inflate:
+                inflate = ZlibBuffer
+            else:
+                inflate = decompress
+
+            offset = self.header.offsets[index]
+            if isinstance(self.buf, LazyBuffer):
+                sectionbuf = self.buf.view(offset)
+            else:
+                sectionbuf = self.buf[offset:]
+
+            section = Section(inflate=inflate)
             section.vsParse(sectionbuf)
-            self.sections.append(section)
 
-        for i, sectiondef in enumerate(SECTIONS):
-            if i > len(self.sections):
-                logger.debug('missing section: %s', sectiondef.name)
-                continue
+        self._sections[index] = section
+        return section
 
-            section = self.sections[i]
-            if not section:
-                logger.debug('missing section: %s', sectiondef.name)
-                continue
+    def inflate_sections(self, threads=4):
+        '''
+        parse the implemented sections (`.id0`, `.id1`, `.nam`, and `.til`) up front,
+         inflating the compressed ones concurrently.
+        zlib releases the GIL while inflating,
+         so this takes roughly as long as inflating the largest section.
 
-            if not sectiondef.cls:
-                logger.warn('section class not implemented: %s', sectiondef.name)
-                continue
+        Args:
+          threads (int): the number of worker threads.
+        '''
+        indices = [i for i, sectiondef in enumerate(SECTIONS)
+                   if sectiondef.cls is not None and i not in self._sections]
+        threads = max(1, min(threads, len(indices)))
 
+        errors = []
+
+        def work(chunk):
+            try:
+                for index in chunk:
+                    self.get_section(index)
+            except Exception:
+                errors.append(sys.exc_info())
+
+        # the current thread takes the first share of the work.
+        workers = [threading.Thread(target=work, args=(indices[i::threads], ))
+                   for i in range(1, threads)]
+        for worker in workers:
+            worker.start()
+        work(indices[0::threads])
+        for worker in workers:
+            worker.join()
+
+        if errors:
+            six.reraise(*errors[0])
+
+    def _load_section(self, index):
+        sectiondef = SECTIONS[index]
+        section = self.get_section(index)
+
+        s = None
+        if not section:
+            logger.debug('missing section: %s', sectiondef.name)
+        elif not sectiondef.cls:
+            logger.warn('section class not implemented: %s', sectiondef.name)
+        else:
             s = sectiondef.cls(buf=section.contents, wordsize=self.wordsize)
             s.vsParse(section.contents)
-            # vivisect doesn't allow you to assign vstructs to
-            #  attributes that are not part of the struct,
-            # so we need to override and use the default object behavior.
-            object.__setattr__(self, sectiondef.name, s)
             logger.debug('parsed section: %s', sectiondef.name)
 
+        # vivisect doesn't allow you to assign vstructs to
+        #  attributes that are not part of the struct,
+        # so we need to override and use the default object behavior.
+        # subsequent accesses then find the section without calling `__getattr__`.
+        object.__setattr__(self, sectiondef.name, s)
+        return s
+
+    def __getattr__(self, key):
+        for i, sectiondef in enumerate(SECTIONS):
+            if sectiondef.name == key:
+                return self._load_section(i)
+        return vstruct.VStruct.__getattr__(self, key)
+
+    def close(self):
+        '''
+        drop the references to the underlying buffer and the parsed sections,
+         so the buffer (like a memory mapping) can be released.
+        the database must not be used afterwards.
+        '''
+        self.buf = None
+        self._sections.clear()
+        for sectiondef in SECTIONS:
+            self.__dict__.pop(sectiondef.name, None)
+
     def validate(self):
         self.header.validate()
         self.id0.validate()
@@ -1134,3 +2873,103 @@ class IDB(vstruct.VStruct):
         self.nam.validate()
         self.til.validate()
         return True
+
+
+class IDBComponents(object):
+    '''
+    an IDA Pro database that is unpacked into its component files.
+
+    while a database is open, IDA works with the sections as separate files
+     next to the `.idb`/`.i64` (`.id0`, `.id1`, `.nam`, and `.til`).
+    this exposes those files with the same section attributes as `IDB`,
+     so `idb.netnode`, `idb.analysis`, and `idb.idapython` work unmodified.
+    like `IDB`, each section is parsed when first accessed.
+
+    the components don't record the word size of the database,
+     so unless provided, it's inferred from the size of the `Root Node` netnode id in ID0.
+
+    Args:
+      buffers (Dict[str, bytes]): map from section name (like `id0`) to the contents of the component.
+        missing components are treated like missing sections.
+      wordsize (int): the word size of the database, 4 or 8.
+      zero_copy (bool): netnode values are returned as memoryview slices of the B-tree pages,
+        rather than copied into bytes.
+    '''
+    def __init__(self, buffers, wordsize=None, zero_copy=False):
+        super(IDBComponents, self).__init__()
+        self.buffers = buffers
+        self.zero_copy = zero_copy
+        # map from netnode name to shared `Netnode` instance, see `idb.netnode.get_netnode()`.
+        self.netnodes = {}
+
+        if wordsize is None:
+            wordsize = self._guess_wordsize()
+        self.wordsize = wordsize
+        if wordsize == 4:
+            self.uint = idb.netnode.uint32
+        elif wordsize == 8:
+            self.uint = idb.netnode.uint64
+        else:
+            raise RuntimeError('unexpected wordsize')
+        # shared by the netnodes of this database, see `idb.netnode.KeyCodec`.
+        self.key_codec = idb.netnode.get_key_codec(wordsize)
+
+    def _parse_section(self, sectiondef, wordsize):
+        buf = self.buffers.get(sectiondef.name)
+        if not buf:
+            logger.debug('missing component: %s', sectiondef.name)
+            return None
+        if not sectiondef.cls:
+            logger.warn('section class not implemented: %s', sectiondef.name)
+            return None
+
+        buf = as_view(buf)
+        s = sectiondef.cls(buf=buf, wordsize=wordsize)
+        s.vsParse(buf)
+        logger.debug('parsed component: %s', sectiondef.name)
+        return s
+
+    def _guess_wordsize(self):
+        # the ID0 structure doesn't depend upon the word size.
+        id0 = self._parse_section(SECTIONS[0], 4)
+        if id0 is None:
+            raise ValueError('missing component: id0')
+
+        try:
+            cursor = id0.find(idb.netnode.make_key('Root Node'))
+        except KeyError:
+            raise ValueError('failed to guess wordsize: no root node')
+
+        wordsize = len(cursor.value)
+        if wordsize not in (4, 8):
+            raise ValueError('failed to guess wordsize: unexpected root node id')
+
+        id0.wordsize = wordsize
+        self.id0 = id0
+        return wordsize
+
+    def __getattr__(self, key):
+        # only invoked when the section hasn't been parsed yet.
+        for sectiondef in SECTIONS:
+            if sectiondef.name == key:
+                s = self._parse_section(sectiondef, self.wordsize)
+                setattr(self, key, s)
+                return s
+        raise AttributeError(key)
+
+    def close(self):
+        '''
+        drop the references to the component buffers and the parsed sections,
+         so the buffers (like memory mappings) can be released.
+        the database must not be used afterwards.
+        '''
+        self.buffers = {}
+        for sectiondef in SECTIONS:
+            self.__dict__.pop(sectiondef.name, None)
+
+    def validate(self):
+        self.id0.validate()
+        self.id1.validate()
+        self.nam.validate()
+        self.til.validate()
+        return True
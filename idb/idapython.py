@@ -374,7 +374,7 @@ class ida_netnode:
         self.api = api
 
     def netnode(self, *args, **kwargs):
-        return idb.netnode.Netnode(self.idb, *args, **kwargs)
+        return idb.netnode.get_netnode(self.idb, *args, **kwargs)
 
 
 class idc:
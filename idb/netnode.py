@@ -1,3 +1,6 @@
+import sys
+import array
+import bisect
 import struct
 import logging
 from collections import namedtuple
@@ -53,33 +56,57 @@ class TAGS:
     LINK = 'L'
 
 
-def make_key(nodeid, tag=None, index=None, wordsize=4):
-    '''
-
-    Example::
+ComplexKey = namedtuple('ComplexKey', ['nodeid', 'tag', 'index'])
 
-        k = make_key('Root Node')
+TAG_LENGTH = 1
+KEY_HEADER_LENGTH = 1
 
 
-    Example::
+class KeyCodec(object):
+    '''
+    encodes and decodes the netnode keys of a database with the given word size.
 
-        k = make_key(0x401000, 'X')
+    the struct layouts are compiled, and the tags encoded, just once,
+     so prefer the shared instance from `get_key_codec()` (or `db.key_codec`)
+     over `make_key()`/`parse_key()` when building or parsing many keys.
 
     Example::
 
-        k = make_key(0x401000, 'X', 0x4010A24)
+        codec = get_key_codec(4)
+        k = codec.make_key(0x401000, 'X', 0x4010A24)
+        assert codec.parse_key(k) == (0x401000, 'X', 0x4010A24)
     '''
-    if wordsize == 4:
-        wordformat = 'I'
-    elif wordsize == 8:
-        wordformat = 'Q'
-    else:
-        raise ValueError('unexpected wordsize')
-
-    if isinstance(nodeid, six.string_types):
-        return b'N' + nodeid.encode('utf-8')
+    def __init__(self, wordsize):
+        super(KeyCodec, self).__init__()
+        if wordsize == 4:
+            wordformat = 'I'
+        elif wordsize == 8:
+            wordformat = 'Q'
+        else:
+            raise ValueError('unexpected wordsize')
+
+        self.wordsize = wordsize
+        # '.' nodeid tag
+        self.node_tag = struct.Struct('>c' + wordformat + 'c')
+        # '.' nodeid tag index, with an unsigned or signed index.
+        self.node_tag_index = struct.Struct('>c' + wordformat + 'c' + wordformat)
+        self.node_tag_signed_index = struct.Struct('>c' + wordformat + 'c' + wordformat.lower())
+        # the index alone, found at `index_offset` in keys at least `key_length` long.
+        self.index = struct.Struct('>' + wordformat)
+        self.index_offset = KEY_HEADER_LENGTH + wordsize + TAG_LENGTH
+        self.key_length = self.index_offset + wordsize
+
+        # map from tag (str) to encoded tag (bytes), and back.
+        # populated as tags are seen.
+        self._tags = {}
+        self._tag_names = {}
+
+    def encode_tag(self, tag):
+        try:
+            return self._tags[tag]
+        except (KeyError, TypeError):
+            pass
 
-    elif isinstance(nodeid, six.integer_types):
         if tag is None:
             raise ValueError('tag required')
         if not isinstance(tag, str):
@@ -87,76 +114,281 @@ def make_key(nodeid, tag=None, index=None, wordsize=4):
         if len(tag) != 1:
             raise ValueError('tag must be a single character string')
 
-        tag = tag.encode('ascii')
+        encoded = tag.encode('ascii')
+        self._tags[tag] = encoded
+        return encoded
+
+    def make_key(self, nodeid, tag=None, index=None):
+        '''
+        like `make_key()`, using this codec's word size.
+        '''
+        if isinstance(nodeid, six.integer_types):
+            tag = self.encode_tag(tag)
+            if index is None:
+                return self.node_tag.pack(b'.', nodeid, tag)
+            elif index < 0:
+                return self.node_tag_signed_index.pack(b'.', nodeid, tag, index)
+            else:
+                return self.node_tag_index.pack(b'.', nodeid, tag, index)
+
+        elif isinstance(nodeid, six.string_types):
+            return b'N' + nodeid.encode('utf-8')
 
-        if index is None:
-            return b'.' + struct.pack('>' + wordformat + 'c', nodeid, tag)
-        elif index < 0:
-            return b'.' + struct.pack('>' + wordformat + 'c' + wordformat.lower(), nodeid, tag, index)
         else:
-            return b'.' + struct.pack('>' + wordformat + 'c' + wordformat, nodeid, tag, index)
-    else:
-        raise ValueError('unexpected type of nodeid: ' + str(type(nodeid)))
+            raise ValueError('unexpected type of nodeid: ' + str(type(nodeid)))
 
+    def parse_key(self, buf):
+        '''
+        like `parse_key()`, using this codec's word size.
+        '''
+        if six.indexbytes(buf, 0x0) != 0x2E:
+            raise ValueError('buf is not a complex key')
 
-ComplexKey = namedtuple('ComplexKey', ['nodeid', 'tag', 'index'])
+        _, nodeid, tag = self.node_tag.unpack_from(buf)
+        try:
+            name = self._tag_names[tag]
+        except KeyError:
+            name = tag.decode('ascii')
+            self._tag_names[tag] = name
 
-TAG_LENGTH = 1
-KEY_HEADER_LENGTH = 1
+        if len(buf) >= self.key_length:
+            index = self.index.unpack_from(buf, self.index_offset)[0]
+        else:
+            index = None
 
+        return ComplexKey(nodeid, name, index)
 
-def parse_key(buf, wordsize=4):
-    if six.indexbytes(buf, 0x0) != 0x2E:
-        raise ValueError('buf is not a complex key')
 
-    if wordsize == 4:
-        wordformat = 'I'
-    elif wordsize == 8:
-        wordformat = 'Q'
-    else:
+KEY_CODECS = {
+    4: KeyCodec(4),
+    8: KeyCodec(8),
+}
+
+
+def get_key_codec(wordsize):
+    '''
+    fetch the shared key codec for the given word size.
+
+    Raises:
+      ValueError: if the word size is not 4 or 8.
+    '''
+    try:
+        return KEY_CODECS[wordsize]
+    except KeyError:
         raise ValueError('unexpected wordsize')
 
-    nodeid, tag = struct.unpack_from('>' + wordformat + 'c', buf, 1)
-    tag = tag.decode('ascii')
-    if len(buf) >= TAG_LENGTH + 2 * wordsize + KEY_HEADER_LENGTH:
-        offset = TAG_LENGTH + KEY_HEADER_LENGTH + wordsize
-        index = struct.unpack_from('>' + wordformat, buf, offset)[0]
-    else:
-        index = None
 
-    return ComplexKey(nodeid, tag, index)
+def make_key(nodeid, tag=None, index=None, wordsize=4):
+    '''
+
+    Example::
+
+        k = make_key('Root Node')
+
+
+    Example::
+
+        k = make_key(0x401000, 'X')
+
+    Example::
+
+        k = make_key(0x401000, 'X', 0x4010A24)
+    '''
+    return get_key_codec(wordsize).make_key(nodeid, tag, index)
+
+
+def parse_key(buf, wordsize=4):
+    return get_key_codec(wordsize).parse_key(buf)
+
+
+# the struct format characters of little endian integers, by size in bytes.
+UINT_FORMATS = {1: 'B', 2: 'H', 4: 'L', 8: 'Q'}
+INT_FORMATS = {1: 'b', 2: 'h', 4: 'l', 8: 'q'}
+
+_UINT_STRUCTS = {size: struct.Struct('<' + c) for size, c in UINT_FORMATS.items()}
+_INT_STRUCTS = {size: struct.Struct('<' + c) for size, c in INT_FORMATS.items()}
 
 
 def as_uint(buf, wordsize=None):
-    if len(buf) == 1:
-        return struct.unpack('<B', buf)[0]
-    elif len(buf) == 2:
-        return struct.unpack('<H', buf)[0]
-    elif len(buf) == 4:
-        return struct.unpack('<L', buf)[0]
-    elif len(buf) == 8:
-        return struct.unpack('<Q', buf)[0]
-    else:
+    try:
+        s = _UINT_STRUCTS[len(buf)]
+    except KeyError:
         return RuntimeError('unexpected buf size')
+    return s.unpack(buf)[0]
 
 
 def as_int(buf, wordsize=None):
-    if len(buf) == 1:
-        return struct.unpack('<b', buf)[0]
-    elif len(buf) == 2:
-        return struct.unpack('<h', buf)[0]
-    elif len(buf) == 4:
-        return struct.unpack('<l', buf)[0]
-    elif len(buf) == 8:
-        return struct.unpack('<q', buf)[0]
-    else:
+    try:
+        s = _INT_STRUCTS[len(buf)]
+    except KeyError:
         return RuntimeError('unexpected buf size')
+    return s.unpack(buf)[0]
+
+
+def _make_int_array(size, signed=False):
+    '''
+    create an empty array that can hold integers of the given size in bytes.
+    falls back to a list when there's no such array type, like 64-bit arrays on py2.7.
+    '''
+    for typecode in ('bhilq' if signed else 'BHILQ'):
+        try:
+            if array.array(typecode).itemsize >= size:
+                return array.array(typecode)
+        except ValueError:
+            # py2.7 doesn't support 'q' or 'Q'.
+            continue
+    return []
+
+
+def _unpack_ints(buf, size, signed=False):
+    '''
+    decode the packed little endian integers, each of the given size, into an array.
+    '''
+    values = _make_int_array(size, signed)
+    if isinstance(values, array.array) and values.itemsize == size:
+        # the array layout matches, so this is just a copy.
+        if six.PY2:
+            values.fromstring(bytes(buf))
+        else:
+            values.frombytes(buf)
+        if sys.byteorder == 'big':
+            values.byteswap()
+    else:
+        formats = INT_FORMATS if signed else UINT_FORMATS
+        values.extend(struct.unpack('<%d%s' % (len(buf) // size, formats[size]), buf))
+    return values
+
+
+def decode_ints(bufs, signed=False):
+    '''
+    decode many little endian integers at once, like calling `as_uint()` (or `as_int()`) on each buffer.
+
+    rather than dispatching on the length of each buffer,
+     the buffers are grouped by size and each group is decoded with a single call.
+
+    Args:
+      bufs (Sequence[bytes]): the encoded integers, each 1, 2, 4, or 8 bytes long.
+      signed (bool): decode signed integers.
+
+    Returns:
+      Union[array.array, List[int]]: the decoded integers, in order.
+        this is an array unless there's no array type wide enough (see `_make_int_array`).
+
+    Raises:
+      ValueError: if a buffer has an unexpected length.
+
+    Example::
+
+        assert list(decode_ints([b'\\x01', b'\\xFF\\xFF'], signed=True)) == [1, -1]
+    '''
+    sizes = set(len(buf) for buf in bufs)
+    for size in sizes:
+        if size not in UINT_FORMATS:
+            raise ValueError('unexpected buf size: %d' % (size))
+
+    if len(sizes) <= 1:
+        # the common case: all the values have the same size.
+        size = sizes.pop() if sizes else 1
+        return _unpack_ints(b''.join(bufs), size, signed)
+
+    decoded = [0] * len(bufs)
+    for size in sizes:
+        positions = [i for i, buf in enumerate(bufs) if len(buf) == size]
+        group = _unpack_ints(b''.join(bufs[i] for i in positions), size, signed)
+        for i, value in zip(positions, group):
+            decoded[i] = value
+
+    values = _make_int_array(max(sizes), signed)
+    values.extend(decoded)
+    return values
 
 
 def as_string(buf, wordsize=None):
     return bytes(buf).rstrip(b'\x00').decode('utf-8').rstrip('\x00')
 
 
+# the named value decoders for `Netnode.load_tag()`.
+# `raw` values are left as stored (see `Netnode.get_val()`), and aren't listed here.
+DECODERS = {
+    'uint': as_uint,
+    'int': as_int,
+    'string': as_string,
+}
+
+# the default decoder for values under each tag, otherwise `raw`.
+# these match `Netnode.altval()` and `Netnode.charval()`.
+TAG_DECODERS = {
+    TAGS.ALTVAL: 'int',
+    TAGS.CHARVAL: 'int',
+}
+
+
+class TagMap(object):
+    '''
+    the entries under one tag of a netnode, as a read-only mapping from index to decoded value.
+    see `Netnode.load_tag()`.
+
+    the indices are kept in a sorted array alongside a list of the values
+     (or an array, for integer values), so looking up an index is a binary search.
+    iteration is ordered by index.
+    '''
+    def __init__(self, indices, values):
+        super(TagMap, self).__init__()
+        self.indices = indices
+        self._values = values
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __iter__(self):
+        return iter(self.indices)
+
+    def _find(self, index):
+        i = bisect.bisect_left(self.indices, index)
+        if i == len(self.indices) or self.indices[i] != index:
+            return None
+        return i
+
+    def __contains__(self, index):
+        return self._find(index) is not None
+
+    def __getitem__(self, index):
+        i = self._find(index)
+        if i is None:
+            raise KeyError(index)
+        return self._values[i]
+
+    def get(self, index, default=None):
+        i = self._find(index)
+        if i is None:
+            return default
+        return self._values[i]
+
+    def keys(self):
+        return list(self.indices)
+
+    def values(self):
+        return list(self._values)
+
+    def items(self):
+        return list(zip(self.indices, self._values))
+
+    def arrays(self):
+        '''
+        fetch the indices and values as they're stored, without copying them.
+
+        values decoded as `int` or `uint` are kept in an `array.array`, like the indices,
+         so both can be wrapped by `numpy.frombuffer()` without copying, too.
+
+        Returns:
+          Tuple[Sequence[int], Sequence[Any]]: the sorted indices, and the values in the same order.
+        '''
+        return self.indices, self._values
+
+    def __repr__(self):
+        return 'TagMap(%d entries)' % (len(self))
+
+
 # try to implement the methods here:
 #
 #   https://www.hex-rays.com/products/ida/support/sdkdoc/classnetnode.html
@@ -193,6 +425,7 @@ class Netnode(object):
         '''
         self.idb = db
         self.wordsize = self.idb.wordsize
+        self.key_codec = self.idb.key_codec
         if self.wordsize == 4:
             self.nodebase = 0xFF000000
         elif self.wordsize == 8:
@@ -201,10 +434,17 @@ class Netnode(object):
             raise RuntimeError('unexpected wordsize')
 
         if isinstance(nodeid, six.string_types):
-            key = make_key(nodeid, wordsize=self.wordsize)
-            cursor = self.idb.id0.find(key)
-            self.nodeid = as_uint(cursor.value)
-            logger.info('resolved string netnode %s to %x', nodeid, self.nodeid)
+            handle = self.idb.netnodes.get(nodeid)
+            if handle is not None:
+                self.nodeid = handle.nodeid
+            else:
+                key = self.key_codec.make_key(nodeid)
+                cursor = self.idb.id0.find(key)
+                self.nodeid = as_uint(cursor.value)
+                logger.info('resolved string netnode %s to %x', nodeid, self.nodeid)
+                # the database is read-only, so the name resolves the same from now on.
+                # see `get_netnode`.
+                self.idb.netnodes[nodeid] = self
         elif isinstance(nodeid, six.integer_types):
             self.nodeid = nodeid
         else:
@@ -228,10 +468,20 @@ class Netnode(object):
         Raises:
           KeyError: if the name for the netnode does not exist.
         '''
-        key = make_key(self.nodeid, TAGS.NAME, wordsize=self.wordsize)
+        key = self.key_codec.make_key(self.nodeid, TAGS.NAME)
         cursor = self.idb.id0.find(key)
         return as_string(cursor.value)
 
+    def _get_value(self, cursor):
+        '''
+        fetch the value at the given cursor,
+         copying it out of the B-tree page unless the database is in zero-copy mode.
+        '''
+        if self.idb.zero_copy:
+            return cursor.value
+        else:
+            return bytes(cursor.value)
+
     def get_tag_entries(self, tag=TAGS.SUPVAL):
         '''
         generate the entries for the given tag in this netnode.
@@ -245,18 +495,81 @@ class Netnode(object):
         Yields:
           Entry: an entry (with key and value) under the given tag in this netnode.
         '''
-        key = make_key(self.nodeid, tag, wordsize=self.wordsize)
-        try:
-            cursor = self.idb.id0.find_prefix(key)
-        except KeyError:
-            return
-        while bytes(cursor.key).startswith(key):
-            parsed_key = parse_key(cursor.key, wordsize=self.idb.wordsize)
-            yield Entry(cursor.key, parsed_key, cursor.value)
+        key = self.key_codec.make_key(self.nodeid, tag)
+        for k, v in self.idb.id0.scan(prefix=key):
+            parsed_key = self.key_codec.parse_key(k)
+            yield Entry(k, parsed_key, v)
+
+    def load_tag(self, tag=TAGS.SUPVAL, decode=None):
+        '''
+        load all the entries under the given tag in this netnode, in a single range scan.
+
+        this is much cheaper than decoding the values from `.supentries()` (or `.altentries()`, etc.)
+         one by one, since there's no `Entry` or `ComplexKey` for each entry.
+        entries without a numeric index, such as hash entries keyed by string, are skipped.
+
+        Args:
+          tag (str): single character tag.
+          decode (Union[str, Callable[[bytes], Any]]): how to decode the values.
+            either a function that accepts the raw value,
+             or one of `raw`, `uint`, `int`, or `string`.
+            the default depends on the tag: alt and char values are `int`, like `.altval()`,
+             and otherwise `raw`, like `.supval()`.
+            `int` and `uint` values are decoded in bulk into an array, see `TagMap.arrays()`.
+
+        Returns:
+          TagMap: mapping from index to decoded value.
+
+        Raises:
+          ValueError: if the decoder is not recognized.
+
+        Example::
+
+            funcs = idb.netnode.get_netnode(db, '$ funcs').load_tag('S')
+            for ea in funcs:
+                print(hex(ea), len(funcs[ea]))
+        '''
+        if decode is None:
+            decode = TAG_DECODERS.get(tag, 'raw')
+
+        # integers are gathered raw and then decoded together, see `decode_ints()`.
+        signed = None
+        if decode == 'int' or decode == 'uint':
+            signed = decode == 'int'
+            decode = None
+        elif decode == 'raw':
+            # like `._get_value()`.
+            decode = None if self.idb.zero_copy else bytes
+        elif isinstance(decode, six.string_types):
+            try:
+                decode = DECODERS[decode]
+            except KeyError:
+                raise ValueError('unexpected decoder: ' + decode)
+
+        codec = self.key_codec
+        prefix = codec.make_key(self.nodeid, tag)
+        # the index follows the tag as a big endian word.
+        offset = codec.index_offset
+        key_length = codec.key_length
+        index_format = codec.index
+
+        indices = _make_int_array(self.wordsize)
+        values = []
+        for key, value in self.idb.id0.scan(prefix=prefix):
+            if len(key) != key_length:
+                continue
+            indices.append(index_format.unpack_from(key, offset)[0])
+            values.append(value if decode is None else decode(value))
+
+        if signed is not None:
             try:
-                cursor.next()
-            except IndexError:
-                break
+                values = decode_ints(values, signed=signed)
+            except ValueError:
+                # there's a value of unexpected size, so decode them one by one, like `.altval()`.
+                decode = as_int if signed else as_uint
+                values = [decode(value) for value in values]
+
+        return TagMap(indices, values)
 
     def get_val(self, index, tag=TAGS.SUPVAL):
         '''
@@ -269,10 +582,11 @@ class Netnode(object):
 
         Returns:
           bytes: the raw data.
+            in zero-copy mode (see `idb.from_file`), this is a memoryview of the B-tree page.
         '''
-        key = make_key(self.nodeid, tag, index, wordsize=self.wordsize)
+        key = self.key_codec.make_key(self.nodeid, tag, index)
         cursor = self.idb.id0.find(key)
-        return bytes(cursor.value)
+        return self._get_value(cursor)
 
     def supval(self, index, tag=TAGS.SUPVAL):
         return self.get_val(index, tag)
@@ -358,9 +672,9 @@ class Netnode(object):
         fetch the default netnode value.
         this is basically supval(tag='V').
         '''
-        key = make_key(self.nodeid, TAGS.VALUE, wordsize=self.wordsize)
+        key = self.key_codec.make_key(self.nodeid, TAGS.VALUE)
         cursor = self.idb.id0.find(key)
-        return bytes(cursor.value)
+        return self._get_value(cursor)
 
     def valstr(self):
         return as_string(self.valobj())
@@ -374,11 +688,131 @@ class Netnode(object):
     def long_value(self):
         return as_uint(self.valobj())
 
-    def blobsize(self):
+    def _get_blob_values(self, start, tag):
+        '''
+        generate the raw values of the blob at the given index, in order.
+        see `.iterblob()`.
+        '''
+        codec = self.key_codec
+        prefix = codec.make_key(self.nodeid, tag)
+        start_key = codec.make_key(self.nodeid, tag, start)
+        offset = codec.index_offset
+        key_length = codec.key_length
+        index_format = codec.index
+
+        # the index of the next chunk, as stored in the key.
+        expected = index_format.unpack_from(start_key, offset)[0]
+        for key, value in self.idb.id0.scan(start_key=start_key, prefix=prefix):
+            if len(key) != key_length or index_format.unpack_from(key, offset)[0] != expected:
+                # the blob ends at the first missing index.
+                return
+            yield value
+            expected += 1
+
+    def iterblob(self, start, tag=TAGS.SUPVAL):
+        '''
+        generate the chunks of the blob stored at the given index.
+
+        IDA splits blobs across the values at consecutive indices,
+         starting at the given index and ending at the first missing index.
+        this walks the entries in a single range scan, and doesn't hold onto the chunks,
+         so large blobs can be processed in constant memory.
+
+        Args:
+          start (int): the index of the first chunk.
+          tag (str): single character tag.
+
+        Yields:
+          bytes: the next chunk of the blob.
+            in zero-copy mode (see `idb.from_file`), this is a memoryview of the B-tree page.
+
+        Example::
+
+            with open('blob.bin', 'wb') as f:
+                for chunk in nn.iterblob(0x0, 'S'):
+                    f.write(chunk)
+        '''
+        copy = not self.idb.zero_copy
+        for value in self._get_blob_values(start, tag):
+            yield bytes(value) if copy else value
+
+    def blobsize(self, start, tag=TAGS.SUPVAL):
+        '''
+        compute the size of the blob stored at the given index, see `.iterblob()`.
+
+        Returns:
+          int: the size of the blob in bytes, or 0 if there's no blob.
+        '''
+        return sum(len(value) for value in self._get_blob_values(start, tag))
+
+    def readblob(self, buf, start, tag=TAGS.SUPVAL):
+        '''
+        copy the blob stored at the given index into the given buffer, see `.iterblob()`.
+        use `.blobsize()` to figure out how large the buffer must be.
+
+        Args:
+          buf (Union[bytearray, memoryview]): the writable buffer to fill, from its start.
+          start (int): the index of the first chunk.
+          tag (str): single character tag.
+
+        Returns:
+          int: the number of bytes written to the buffer.
+
+        Raises:
+          ValueError: if the blob doesn't fit in the buffer.
+
+        Example::
+
+            buf = bytearray(nn.blobsize(0x0, 'S'))
+            nn.readblob(buf, 0x0, 'S')
         '''
-        TODO: how is this arbitrary data stored?
+        view = memoryview(buf)
+        size = len(view)
+        offset = 0
+        for value in self._get_blob_values(start, tag):
+            end = offset + len(value)
+            if end > size:
+                raise ValueError('buffer too small for blob')
+            view[offset:end] = value
+            offset = end
+        return offset
+
+    def getblob(self, start, tag=TAGS.SUPVAL):
+        '''
+        fetch the blob stored at the given index, see `.iterblob()`.
+
+        Returns:
+          Optional[bytes]: the contents of the blob, or None if there's no blob.
         '''
-        raise NotImplementedError()
+        chunks = list(self._get_blob_values(start, tag))
+        if not chunks:
+            return None
+        return b''.join(chunks)
+
+
+def get_netnode(db, nodeid):
+    '''
+    fetch a netnode handle, sharing a single instance per name for each database,
+     so each name, like `$ funcs`, is resolved to its node id just once.
+    numeric node ids don't need to be resolved, so these get a new handle.
+
+    Args:
+      db (idb.IDB): the IDA Pro database.
+      nodeid (Union[str, int]): the node id used to identify the netnode.
+
+    Returns:
+      Netnode: the netnode.
 
-    def getblob(self):
-        raise NotImplementedError()
+    Raises:
+      KeyError: if the name is not found.
+
+    Example::
+
+        nn = get_netnode(db, '$ funcs')
+        assert nn is get_netnode(db, '$ funcs')
+    '''
+    if isinstance(nodeid, six.string_types):
+        handle = db.netnodes.get(nodeid)
+        if handle is not None:
+            return handle
+    return Netnode(db, nodeid)
@@ -42,29 +42,23 @@ def main(argv=None):
         logging.getLogger().setLevel(logging.INFO)
 
     with idb.from_file(args.idbpath) as db:
-        cursor = db.id0.get_min()
-        while True:
-            if cursor.key[0] == 0x2E:
+        for key, value in db.id0.scan():
+            if key[0] == 0x2E:
                 try:
-                    k = idb.netnode.parse_key(cursor.key, wordsize=db.wordsize)
+                    k = db.key_codec.parse_key(key)
                 except UnicodeDecodeError:
-                    hexdump.hexdump(cursor.key)
+                    hexdump.hexdump(key)
                 else:
                     print('nodeid: %x tag: %s index: %s' % (
                         k.nodeid,
                         k.tag,
                         hex(k.index) if k.index is not None else 'None'))
             else:
-                hexdump.hexdump(cursor.key)
+                hexdump.hexdump(key)
 
-            hexdump.hexdump(bytes(cursor.value))
+            hexdump.hexdump(bytes(value))
             print('--')
 
-            try:
-                cursor.next()
-            except IndexError:
-                break
-
     return 0
 
 
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+'''
+Print a report of the structure of an IDB B-tree,
+ and optionally, the work done to query it with a given page cache size.
+
+author: Willi Ballenthin
+email: willi.ballenthin@gmail.com
+'''
+import sys
+import random
+import logging
+
+import argparse
+
+import idb
+
+
+logger = logging.getLogger(__name__)
+
+
+def format_distribution(dist, fmt='%d'):
+    return ('min: ' + fmt + '  mean: %.2f  median: ' + fmt + '  p90: ' + fmt + '  max: ' + fmt) % (
+        dist.min, dist.mean, dist.median, dist.p90, dist.max)
+
+
+def print_statistics(stats):
+    print('page size:         0x%x' % (stats.page_size))
+    print('page count:        %d' % (stats.page_count))
+    print('depth:             %d' % (stats.depth))
+    print('branch pages:      %d' % (stats.branch_pages))
+    print('leaf pages:        %d' % (stats.leaf_pages))
+    print('entries:           %d' % (stats.entries))
+    for i, level in enumerate(stats.levels):
+        print('  level %d:         %d pages, %d entries' % (i, level.pages, level.entries))
+    print('entries per page:  %s' % (format_distribution(stats.entries_per_page)))
+    print('fill factor:       %s' % (format_distribution(stats.fill_factor, fmt='%.2f')))
+    print('key size:          %s' % (format_distribution(stats.key_sizes)))
+    print('value size:        %s' % (format_distribution(stats.value_sizes)))
+
+
+def print_profile(name, profile):
+    print('%s:' % (name))
+    print('  queries:         %d' % (profile.queries))
+    print('  negative hits:   %d' % (profile.negative_hits))
+    if profile.pages:
+        print('  pages:           %d (hits: %d, misses: %d, hit rate: %.2f)' % (
+            profile.pages, profile.page_hits, profile.page_misses,
+            profile.page_hits / float(profile.pages)))
+    else:
+        print('  pages:           0')
+    print('  entries decoded: %d' % (profile.entries_decoded))
+    print('  cursor steps:    %d' % (profile.steps))
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(description="Print statistics about an IDB B-tree.")
+    parser.add_argument("idbpath", type=str,
+                        help="Path to input idb file")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile a scan and a sample of lookups")
+    parser.add_argument("--cache-size", type=int, default=None,
+                        help="Number of leaf pages to cache while profiling")
+    parser.add_argument("--sample", type=int, default=0x10,
+                        help="Look up every Nth key, in random order, while profiling")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Enable debug logging")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="Disable all output but errors")
+    args = parser.parse_args(args=argv)
+
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG)
+        logging.getLogger().setLevel(logging.DEBUG)
+    elif args.quiet:
+        logging.basicConfig(level=logging.ERROR)
+        logging.getLogger().setLevel(logging.ERROR)
+    else:
+        logging.basicConfig(level=logging.INFO)
+        logging.getLogger().setLevel(logging.INFO)
+
+    with idb.from_file(args.idbpath) as db:
+        print_statistics(db.id0.get_statistics())
+
+        if args.profile:
+            if args.cache_size is not None:
+                db.id0.page_cache.resize(args.cache_size)
+
+            print('')
+            with db.id0.profile() as profile:
+                keys = [key for key, _ in db.id0.scan()]
+            print_profile('scan', profile)
+
+            keys = keys[::args.sample]
+            random.Random(0).shuffle(keys)
+            with db.id0.profile() as profile:
+                for key in keys:
+                    db.id0.find(key)
+            print_profile('lookups', profile)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
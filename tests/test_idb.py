@@ -1,9 +1,16 @@
+import mmap
+import zlib
+import bisect
+import struct
 import pytest
 import binascii
 
+import six
+
 from fixtures import *
 
 import idb.netnode
+import idb.analysis
 import idb.fileformat
 
 
@@ -81,6 +88,247 @@ def test_compressed(compressed_idb, compressed_i64):
     do_test_compressed(compressed_i64)
 
 
+def test_mmap(small_idb):
+    path = os.path.join(CD, 'data', 'small', 'small-colored.idb')
+    with idb.from_file(path, use_mmap=True) as db:
+        assert db.validate() is True
+        assert db.id0.get_min().key == small_idb.id0.get_min().key
+        assert db.id0.get_max().key == small_idb.id0.get_max().key
+        assert bytes(db.id1.buffer) == bytes(small_idb.id1.buffer)
+        assert db.nam.names() == small_idb.nam.names()
+
+
+def test_mmap_close(monkeypatch):
+    maps = []
+
+    class RecordingMap(mmap.mmap):
+        def __init__(self, *args, **kwargs):
+            maps.append(self)
+    monkeypatch.setattr(mmap, 'mmap', RecordingMap)
+
+    path = os.path.join(CD, 'data', 'small', 'small-colored.idb')
+    with idb.from_file(path, use_mmap=True) as db:
+        assert idb.analysis.Root(db).version == 695
+    # the mapping is closed once the context exits, even though `db` is still bound.
+    assert len(maps) == 1
+    assert maps[0].closed
+
+    with idb.from_components(os.path.join(CD, 'data', 'empty'), use_mmap=True) as db:
+        assert idb.analysis.Root(db).version == 695
+    assert len(maps) > 1
+    assert all(mm.closed for mm in maps)
+
+    # but not while the caller holds slices of it.
+    with idb.from_file(path, use_mmap=True, zero_copy=True) as db:
+        value = db.id0.get_min().value
+    assert not maps[-1].closed
+    assert len(bytes(value)) == len(value)
+
+
+def test_pread(small_idb, tmpdir):
+    path = os.path.join(CD, 'data', 'small', 'small-colored.idb')
+    with idb.from_file(path, use_pread=True) as db:
+        assert db.validate() is True
+        assert db.id0.get_min().key == small_idb.id0.get_min().key
+        assert db.id0.get_max().key == small_idb.id0.get_max().key
+        assert bytes(db.id1.buffer) == bytes(small_idb.id1.buffer)
+        assert db.nam.names() == small_idb.nam.names()
+
+    data = b''.join(struct.pack('<I', i) for i in range(0x1000))
+    p = tmpdir.join('data.bin')
+    p.write_binary(data)
+    with open(str(p), 'rb') as f:
+        buf = idb.fileformat.FileBuffer(f, block_size=0x100, cache_size=2)
+        # within a block, and straddling blocks.
+        assert buf[0x10:0x20] == data[0x10:0x20]
+        assert buf[0xF0:0x110] == data[0xF0:0x110]
+        # the pool is bounded.
+        assert len(buf._blocks) == 2
+        assert buf[0x800:0x804] == data[0x800:0x804]
+        assert len(buf._blocks) == 2
+        # large reads bypass the pool.
+        assert buf[0x0:0x1000] == data[0x0:0x1000]
+        assert len(buf._blocks) == 2
+        # the final, short block.
+        assert buf[0x3FF8:0x4008] == data[0x3FF8:]
+
+
+def test_zlib_buffer():
+    data = b''.join(struct.pack('<I', i) for i in range(0x10000))
+    buf = idb.fileformat.ZlibBuffer(zlib.compress(data), span=0x1000)
+
+    # reads within a single span, and across spans.
+    assert buf[0x10:0x20] == data[0x10:0x20]
+    assert buf[0x8000:0x8004] == data[0x8000:0x8004]
+    assert buf[0xFF0:0x3010] == data[0xFF0:0x3010]
+    # seek backwards, which resumes from an earlier snapshot.
+    assert buf[0x1004:0x1008] == data[0x1004:0x1008]
+    assert buf[0x3FFFE] == six.indexbytes(data, 0x3FFFE)
+
+    assert buf[len(data) - 2:len(data) + 2] == data[-2:]
+    assert len(buf) == len(data)
+    assert bytes(buf) == data
+
+    view = buf.view(0x2000, 0x3000)
+    assert len(view) == 0x1000
+    assert view[:] == data[0x2000:0x3000]
+    assert view[0xFFC:0x1004] == data[0x2FFC:0x3000]
+
+
+def test_lazy_inflate():
+    path = os.path.join(CD, 'data', 'elf', 'ls.i64')
+    eager = load_idb(path)
+    with idb.from_file(path, lazy_inflate=True) as db:
+        assert db.get_section(0).header.is_compressed is True
+        assert isinstance(db.get_section(0).contents, idb.fileformat.ZlibBuffer)
+
+        assert db.id0.get_min().key == eager.id0.get_min().key
+        assert db.id0.get_max().key == eager.id0.get_max().key
+        assert idb.analysis.Root(db).md5 == idb.analysis.Root(eager).md5
+
+        for segment in eager.id1.segments:
+            ea = segment.bounds.start
+            assert db.id1.get_flags(ea) == eager.id1.get_flags(ea)
+        assert db.nam.names() == eager.nam.names()
+
+
+def test_atomic_write(tmpdir):
+    path = str(tmpdir.join('out.bin'))
+    with idb.fileformat.atomic_write(path) as f:
+        f.write(b'first')
+    assert tmpdir.join('out.bin').read_binary() == b'first'
+
+    # a failed write leaves the existing file, and no temporary file, behind.
+    with pytest.raises(ValueError):
+        with idb.fileformat.atomic_write(path) as f:
+            f.write(b'second')
+            raise ValueError('failed')
+    assert tmpdir.join('out.bin').read_binary() == b'first'
+    assert os.listdir(str(tmpdir)) == ['out.bin']
+
+
+def test_section_cache(tmpdir, monkeypatch):
+    path = os.path.join(CD, 'data', 'elf', 'ls.i64')
+    cache_dir = str(tmpdir.join('cache'))
+    eager = load_idb(path)
+
+    with idb.from_file(path, cache_dir=cache_dir) as db:
+        assert db.id0.get_min().key == eager.id0.get_min().key
+        assert db.nam.names() == eager.nam.names()
+    # one entry each for id0 and nam.
+    assert len(os.listdir(cache_dir)) == 2
+
+    # once cached, the sections are not decompressed again.
+    def fail(*args, **kwargs):
+        raise AssertionError('unexpected decompression')
+    monkeypatch.setattr(zlib, 'decompress', fail)
+    monkeypatch.setattr(zlib, 'decompressobj', fail)
+
+    with idb.from_file(path, cache_dir=cache_dir) as db:
+        assert db.id0.get_min().key == eager.id0.get_min().key
+        assert db.id0.get_max().key == eager.id0.get_max().key
+        assert db.nam.names() == eager.nam.names()
+        assert idb.analysis.Root(db).md5 == idb.analysis.Root(eager).md5
+
+
+def test_section_cache_threads(tmpdir, monkeypatch):
+    path = os.path.join(CD, 'data', 'elf', 'ls.i64')
+    cache_dir = str(tmpdir.join('cache'))
+    eager = load_idb(path)
+
+    # simulate another worker creating the cache directory first.
+    makedirs = os.makedirs
+
+    def racing_makedirs(name, *args, **kwargs):
+        makedirs(name)
+        return makedirs(name, *args, **kwargs)
+    monkeypatch.setattr(os, 'makedirs', racing_makedirs)
+
+    for _ in range(2):
+        with idb.from_file(path, cache_dir=cache_dir, inflate_threads=4) as db:
+            for index in (0, 1, 2, 4):
+                assert bytes(db.get_section(index).contents) == bytes(eager.get_section(index).contents)
+            assert db.id0.get_min().key == eager.id0.get_min().key
+        # one entry each for id0, id1, nam, and til.
+        assert len(os.listdir(cache_dir)) == 4
+
+
+def test_inflate_threads():
+    path = os.path.join(CD, 'data', 'elf', 'ls.i64')
+    eager = load_idb(path)
+    with idb.from_file(path, inflate_threads=4) as db:
+        # id0, id1, nam, and til are inflated up front.
+        for index in (0, 1, 2, 4):
+            assert index in db._sections
+            assert bytes(db.get_section(index).contents) == bytes(eager.get_section(index).contents)
+
+        assert db.id0.get_min().key == eager.id0.get_min().key
+        assert db.nam.names() == eager.nam.names()
+
+
+def test_probe():
+    info = idb.probe(os.path.join(CD, 'data', 'small', 'small-colored.idb'))
+    assert info.wordsize == 4
+    assert info.version == 695
+    assert info.version_string == '6.95'
+    assert info.md5 == 'c897d1410af8f2c74fba11b1db511e9e'
+    assert info.input_file_path.endswith('small.bin')
+
+    # compressed
+    info = idb.probe(os.path.join(CD, 'data', 'elf', 'ls.i64'))
+    assert info.wordsize == 8
+    assert info.version == 700
+    assert info.version_string == '7.00'
+    assert info.md5 == '4f428f95740ec935125766de5baa8a0d'
+    assert info.input_file_path.endswith('ls')
+
+
+def test_components(tmpdir):
+    # as left on disk by IDA while the database is open.
+    with idb.from_components(os.path.join(CD, 'data', 'empty')) as db:
+        assert db.wordsize == 4
+        assert db.validate() is True
+        assert db.seg is None
+        assert idb.analysis.Root(db).version == 695
+
+    # unpack the sections of a 64-bit database, and compare with the packed container.
+    path = os.path.join(CD, 'data', 'elf', 'ls.i64')
+    with idb.from_file(path) as packed:
+        for i, sectiondef in enumerate(idb.fileformat.SECTIONS):
+            section = packed.get_section(i)
+            if sectiondef.cls is not None and section is not None:
+                tmpdir.join('ls.' + sectiondef.name).write_binary(bytes(section.contents))
+
+        with idb.from_components(str(tmpdir.join('ls.i64')), use_mmap=True) as db:
+            assert db.wordsize == 8
+            assert db.validate() is True
+            assert db.id0.get_max().key == packed.id0.get_max().key
+            assert db.nam.names() == packed.nam.names()
+            assert idb.analysis.Root(db).md5 == idb.analysis.Root(packed).md5
+
+    with pytest.raises(ValueError):
+        with idb.from_components(str(tmpdir.join('missing'))):
+            pass
+
+
+def test_lazy_sections():
+    db = load_idb(os.path.join(CD, 'data', 'small', 'small-colored.idb'))
+    # only the file header is parsed when the database is opened.
+    assert db.wordsize == 4
+    assert 'id0' not in db.__dict__
+    assert db.get_section(0) is not None
+
+    # the root node is found in id0, so no other section is touched.
+    assert idb.analysis.Root(db).md5 == 'c897d1410af8f2c74fba11b1db511e9e'
+    assert 'id0' in db.__dict__
+    assert 'id1' not in db.__dict__
+    assert 'nam' not in db.__dict__
+
+    # missing sections are still reported as None.
+    assert db.seg is None
+    assert len(db.sections) == len(idb.fileformat.SECTIONS)
+
+
 @kern32_test([
     (695, 32, b'IDA1'),
     (695, 64, b'IDA2'),
@@ -149,6 +397,406 @@ def test_id0_root_entries(kernel32_idb, version, bitness, expected):
         assert entry.key is not None
 
 
+def test_page_decoder(elf_idb):
+    # the compact decoder must agree with the vstruct definitions of the entries.
+    id0 = elf_idb.id0
+    pending = [id0.root_page]
+    while pending:
+        page = id0.get_page(pending.pop())
+        if not page.is_leaf():
+            pending.append(page.ppointer)
+            pending.extend(e.page for e in page.get_entries())
+
+        key = b''
+        for i, entry in enumerate(page.get_entries()):
+            offset = i * idb.fileformat.SIZEOF_ENTRY
+            if page.is_leaf():
+                ptr = idb.fileformat.LeafEntryPointer()
+                ptr.vsParse(page.contents, offset=offset)
+                expected = idb.fileformat.LeafEntry(key, ptr.common_prefix)
+            else:
+                ptr = idb.fileformat.BranchEntryPointer()
+                ptr.vsParse(page.contents, offset=offset)
+                expected = idb.fileformat.BranchEntry(int(ptr.page))
+                assert entry.page == ptr.page
+            expected.vsParse(page.contents, offset=ptr.offset - idb.fileformat.SIZEOF_ENTRY)
+
+            assert entry.key == bytes(expected.key)
+            assert bytes(entry.value) == bytes(expected.value)
+            key = entry.key
+
+        keys = [e.key for e in page.get_entries()]
+        assert page.get_keys() == keys
+        # the keys share the page prefix, which is stored just once.
+        assert all(k.startswith(page._prefix) for k in keys)
+        assert [page._prefix + suffix for suffix in page._suffixes] == keys
+        assert page.get_entry_count() == page.entry_count == len(keys)
+
+        # the prefix-aware search agrees with a search of the full keys.
+        for i in range(0, len(keys), 5):
+            k = keys[i]
+            for probe in (k, k + b'\x00', k[:-1], k[:len(page._prefix)]):
+                assert page.bisect(probe) == bisect.bisect_left(keys, probe)
+                assert page.bisect(probe, i) == bisect.bisect_left(keys, probe, i)
+        assert page.bisect(b'') == 0
+        assert page.bisect(b'\xFF' * 0x10) == len(keys)
+
+
+def test_find_strategies(elf_idb):
+    # compare each strategy against a search of the sorted list of all the keys.
+    id0 = elf_idb.id0
+
+    keys = []
+    cursor = id0.get_min()
+    while True:
+        keys.append(cursor.key)
+        try:
+            cursor.next()
+        except IndexError:
+            break
+    assert keys == sorted(keys)
+
+    def find(key, strategy):
+        try:
+            return id0.find(key, strategy=strategy).key
+        except KeyError:
+            return None
+
+    for key in keys[::97] + [b'', b'\xff', keys[0], keys[-1]]:
+        for q in (key, key[:-1], key + b'\x00', key[:-1] + b'\xff'):
+            i = bisect.bisect_left(keys, q)
+            exact = keys[i] if i < len(keys) and keys[i] == q else None
+            prefix = keys[i] if i < len(keys) and keys[i].startswith(q) else None
+            j = bisect.bisect_right(keys, q) - 1
+            round_down = keys[j] if j >= 0 else None
+
+            assert find(q, idb.fileformat.EXACT_MATCH) == exact
+            assert find(q, idb.fileformat.PREFIX_MATCH) == prefix
+            assert find(q, idb.fileformat.ROUND_DOWN_MATCH) == round_down
+
+            if round_down is not None:
+                # the cursor must be usable after falling back to a branch entry.
+                cursor = id0.find(q, strategy=idb.fileformat.ROUND_DOWN_MATCH)
+                if j + 1 < len(keys):
+                    cursor.next()
+                    assert cursor.key == keys[j + 1]
+
+
+def test_cursor_walk(elf_idb, monkeypatch):
+    id0 = elf_idb.id0
+
+    calls = []
+    find_index = idb.fileformat.Page.find_index
+
+    def counting_find_index(self, key):
+        calls.append(key)
+        return find_index(self, key)
+    monkeypatch.setattr(idb.fileformat.Page, 'find_index', counting_find_index)
+
+    cursor = id0.get_min()
+    depth = len(cursor.path)
+    forward = [cursor.key]
+    while True:
+        try:
+            cursor.next()
+        except IndexError:
+            break
+        forward.append(cursor.key)
+    assert forward == sorted(forward)
+    assert len(forward) == len(set(forward))
+    # the ancestors are searched at most once, when first stepping out of them.
+    assert len(calls) < depth
+
+    # the cursor is unchanged at the end of the index.
+    assert cursor.key == forward[-1]
+
+    del calls[:]
+    cursor = id0.get_max()
+    backward = [cursor.key]
+    while True:
+        try:
+            cursor.prev()
+        except IndexError:
+            break
+        backward.append(cursor.key)
+    assert backward == forward[::-1]
+    assert len(calls) < depth
+
+    # switch directions across page boundaries.
+    cursor = id0.get_min()
+    for i in range(1, len(forward) - 1, 7):
+        while cursor.key != forward[i]:
+            cursor.next()
+        cursor.next()
+        assert cursor.key == forward[i + 1]
+        cursor.prev()
+        cursor.prev()
+        assert cursor.key == forward[i - 1]
+        cursor.next()
+
+
+def test_scan(elf_idb):
+    id0 = elf_idb.id0
+
+    entries = list(id0.scan())
+    keys = [k for k, _ in entries]
+    assert keys == sorted(keys)
+    assert entries[0] == (id0.get_min().key, id0.get_min().value)
+    assert [k for k, _ in id0.scan(reverse=True)] == keys[::-1]
+
+    for i in range(0, len(keys), len(keys) // 8):
+        for j in (i, min(i + 1, len(keys) - 1), min(i + 300, len(keys) - 1)):
+            start, end = keys[i], keys[j]
+            expected = [k for k in keys if start <= k < end]
+            assert [k for k, _ in id0.scan(start, end)] == expected
+            assert [k for k, _ in id0.scan(start, end, reverse=True)] == expected[::-1]
+
+        # bounds that are not themselves keys.
+        start = keys[i] + b'\x00'
+        assert next(id0.scan(start))[0] == keys[i + 1]
+        assert next(id0.scan(end_key=start, reverse=True))[0] == keys[i]
+
+        for n in (5, len(keys[i]) - 1):
+            prefix = keys[i][:n]
+            expected = [k for k in keys if k.startswith(prefix)]
+            assert [k for k, _ in id0.scan(prefix=prefix)] == expected
+            assert [k for k, _ in id0.scan(prefix=prefix, reverse=True)] == expected[::-1]
+
+    assert list(id0.scan(prefix=b'\xff\xff')) == []
+    assert list(id0.scan(keys[5], keys[5])) == []
+    assert list(id0.scan(keys[6], keys[5])) == []
+
+
+def test_find_many(elf_idb):
+    id0 = elf_idb.id0
+    keys = [k for k, _ in id0.scan()]
+
+    # unsorted, with misses and duplicates.
+    queries = keys[::7][::-1] + [keys[0] + b'\x00', b'', keys[10], keys[-1] + b'\xff'] + keys[::11]
+    cursors = id0.find_many(queries)
+    assert len(cursors) == len(queries)
+    for key, cursor in zip(queries, cursors):
+        if key in keys:
+            assert cursor.key == key
+            assert bytes(cursor.value) == bytes(id0.find(key).value)
+        else:
+            assert cursor is None
+
+    # the cursors are independent, and can be moved.
+    a, b = id0.find_many([keys[10], keys[10]])
+    a.next()
+    assert a.key == keys[11]
+    assert b.key == keys[10]
+    b.prev()
+    assert b.key == keys[9]
+
+    # each page is visited once.
+    id0.page_cache.resize(0)
+    misses = id0.page_cache.misses
+    id0.find_many(keys)
+    assert id0.page_cache.misses - misses <= id0.page_count
+
+    assert id0.find_many([]) == []
+
+
+def test_negative_lookups(elf_idb, tmpdir, monkeypatch):
+    id0 = elf_idb.id0
+    keys = [k for k, _ in id0.scan()]
+    missing = [k + b'\x00' for k in keys[::13]]
+
+    for key in missing:
+        with pytest.raises(KeyError):
+            id0.find(key)
+
+    # repeated misses are answered from the negative cache, without searching the tree.
+    def fail(*args, **kwargs):
+        raise AssertionError('unexpected search')
+    with monkeypatch.context() as m:
+        m.setattr(idb.fileformat.ExactMatchStrategy, 'find', fail)
+        for key in missing:
+            with pytest.raises(KeyError):
+                id0.find(key)
+    id0._misses.clear()
+
+    # no false negatives.
+    path = str(tmpdir.join('ls.bloom'))
+    bf = id0.load_bloom_filter(path)
+    assert id0.bloom_filter is bf
+    for key in keys:
+        assert key in bf
+        assert id0.find(key).key == key
+    assert sum(1 for key in missing if key in bf) < len(missing) // 10
+
+    # the saved filter is reused while the index is unchanged.
+    other = load_idb(os.path.join(CD, 'data', 'elf', 'ls.idb'))
+    with monkeypatch.context() as m:
+        m.setattr(other.id0, 'scan', fail)
+        assert other.id0.load_bloom_filter(path).bits == bf.bits
+
+    # but not for a different index.
+    small = load_idb(os.path.join(CD, 'data', 'small', 'small-colored.idb'))
+    bf = small.id0.load_bloom_filter(path)
+    assert all(key in bf for key, _ in small.id0.scan())
+    assert idb.fileformat.BloomFilter.load(path).fingerprint == small.id0.get_fingerprint()
+
+
+def test_flatten(elf_idb, tmpdir):
+    id0 = elf_idb.id0
+    entries = [(k, bytes(v)) for k, v in id0.scan()]
+    keys = [k for k, _ in entries]
+
+    path = str(tmpdir.join('ls.flat'))
+    flat = id0.flatten(path)
+    assert len(flat) == len(entries)
+    assert [(k, bytes(v)) for k, v in flat.scan()] == entries
+
+    # reopened via mmap.
+    flat = id0.flatten(path)
+    assert isinstance(flat.buf, mmap.mmap)
+    assert [(k, bytes(v)) for k, v in flat.scan(reverse=True)] == entries[::-1]
+
+    for key, value in entries[::17]:
+        assert bytes(flat.find(key)) == value
+        assert flat.bisect(key) == bisect.bisect_left(keys, key)
+        assert flat.bisect(key + b'\x00') == bisect.bisect_left(keys, key + b'\x00')
+        with pytest.raises(KeyError):
+            flat.find(key + b'\x00')
+
+    prefix = keys[100][:5]
+    assert [k for k, _ in flat.scan(prefix=prefix)] == [k for k, _ in id0.scan(prefix=prefix)]
+    assert [k for k, _ in flat.scan(keys[10], keys[20])] == keys[10:20]
+
+    # a snapshot of a different index is rebuilt.
+    small = load_idb(os.path.join(CD, 'data', 'small', 'small-colored.idb'))
+    with pytest.raises(ValueError):
+        idb.fileformat.FlatIndex.load(small.id0, path)
+    flat = small.id0.flatten(path)
+    assert [k for k, _ in flat.scan()] == [k for k, _ in small.id0.scan()]
+
+
+def count_entries(db, entries):
+    return sum(1 for _ in entries)
+
+
+def test_scan_parallel(elf_idb):
+    # the workers open the database by path.
+    path = os.path.join(CD, 'data', 'elf', 'ls.idb')
+    entries = [(k, bytes(v)) for k, v in elf_idb.id0.scan()]
+
+    ranges = elf_idb.id0.partition(7)
+    assert len(ranges) == 7
+    assert ranges[0][0] is None
+    assert ranges[-1][1] is None
+    assert [k for start, end in ranges for k, _ in elf_idb.id0.scan(start, end)] == [k for k, _ in entries]
+
+    results = list(idb.scan_parallel(path, processes=2, partitions=5))
+    assert len(results) == 5
+    assert [e for result in results for e in result] == entries
+
+    assert sum(idb.scan_parallel(path, count_entries, processes=2)) == len(entries)
+
+
+def test_statistics(elf_idb):
+    id0 = elf_idb.id0
+    stats = id0.get_statistics()
+
+    keys = [key for key, _ in id0.scan()]
+    assert stats.entries == len(keys) == stats.key_sizes.count == stats.value_sizes.count
+    assert stats.depth == len(stats.levels)
+    assert stats.levels[0].pages == 1
+    assert sum(level.pages for level in stats.levels) == stats.branch_pages + stats.leaf_pages
+    assert sum(level.entries for level in stats.levels) == stats.entries
+    assert stats.key_sizes.min == min(len(key) for key in keys)
+    assert stats.key_sizes.max == max(len(key) for key in keys)
+    assert 0.0 < stats.fill_factor.min <= stats.fill_factor.mean <= stats.fill_factor.max <= 1.0
+    assert stats.entries_per_page.count == stats.branch_pages + stats.leaf_pages
+
+    assert idb.fileformat.get_distribution([]).count == 0
+    assert idb.fileformat.get_distribution([3, 1, 2]) == idb.fileformat.Distribution(3, 1, 2.0, 2, 3, 3)
+
+
+def test_profile(elf_idb):
+    id0 = elf_idb.id0
+    assert id0.profiler is None
+
+    stats = id0.get_statistics()
+    id0.page_cache.clear()
+    with id0.profile() as profile:
+        count = sum(1 for _ in id0.scan())
+    assert id0.profiler is None
+    assert profile.queries == 1
+    # each page is parsed once, and the cursor steps past every entry.
+    assert profile.page_misses == stats.branch_pages + stats.leaf_pages
+    assert profile.entries_decoded == count
+    assert profile.steps == count
+
+    key = id0.get_min().key
+    with id0.profile() as profile:
+        id0.find(key)
+        with pytest.raises(KeyError):
+            id0.find(key + b'\x00')
+        with pytest.raises(KeyError):
+            id0.find(key + b'\x00')
+    assert profile.queries == 3
+    assert profile.negative_hits == 1
+    assert profile.page_misses == 0
+    assert profile.pages == profile.page_hits > 0
+
+    # nothing is counted outside of the profile.
+    id0.find(key)
+    assert profile.queries == 3
+
+
+def test_zero_copy(small_idb):
+    path = os.path.join(CD, 'data', 'small', 'small-colored.idb')
+    with idb.from_file(path, use_pread=True, zero_copy=True) as db:
+        assert db.zero_copy is True
+        assert isinstance(db.id0.get_min().value, memoryview)
+
+        root = idb.netnode.Netnode(db, 'Root Node')
+        expected = idb.netnode.Netnode(small_idb, 'Root Node')
+        v = root.supval(tag='S', index=1302)
+        assert isinstance(v, memoryview)
+        assert v == expected.supval(tag='S', index=1302)
+        assert isinstance(root.valobj(), memoryview)
+        assert root.valstr() == expected.valstr()
+
+        assert idb.analysis.Root(db).md5 == idb.analysis.Root(small_idb).md5
+        assert idb.analysis.Root(db).version == idb.analysis.Root(small_idb).version
+
+    # by default, accessors copy values out of the page.
+    assert small_idb.zero_copy is False
+    assert isinstance(idb.netnode.Netnode(small_idb, 'Root Node').valobj(), bytes)
+
+
+def test_page_cache(elf_idb):
+    cache = elf_idb.id0.page_cache
+    cache.resize(4)
+
+    keys = []
+    cursor = elf_idb.id0.get_min()
+    while True:
+        keys.append(cursor.key)
+        assert len(cache._pages) <= 4
+        try:
+            cursor.next()
+        except IndexError:
+            break
+
+    assert cache.misses > 0
+    assert cache.evictions > 0
+    # the root page is pinned.
+    assert elf_idb.id0.root_page in cache._pinned
+
+    # evicted pages are re-read as needed.
+    for key in keys[::50]:
+        assert elf_idb.id0.find(key).key == key
+    assert cache.hits > 0
+
+    cache.resize(0)
+    assert len(cache._pages) == 0
+
+
 @kern32_test([
     (695, 32, '24204d4158204c494e4b'),
     (695, 64, '24204d4158204c494e4b'),
@@ -60,3 +60,126 @@ def test_small(small_idb):
     uint32 = small_idb.uint
     assert list(root.alts()) == [uint32(-8), uint32(-5), uint32(-4),
                                  uint32(-3), uint32(-2), uint32(-1)]
+
+
+def test_get_netnode(small_idb):
+    root = idb.netnode.get_netnode(small_idb, ROOT_NODEID)
+    assert root is idb.netnode.get_netnode(small_idb, ROOT_NODEID)
+    assert root.nodeid == 0xFF000002
+
+    # once a name is resolved, it isn't looked up again.
+    with small_idb.id0.profile() as profile:
+        nn = idb.netnode.Netnode(small_idb, ROOT_NODEID)
+        assert nn.nodeid == root.nodeid
+        assert idb.netnode.get_netnode(small_idb, ROOT_NODEID).nodeid == root.nodeid
+    assert profile.queries == 0
+
+    # numeric node ids aren't shared.
+    assert idb.netnode.get_netnode(small_idb, root.nodeid) is not root
+    assert idb.netnode.get_netnode(small_idb, root.nodeid).nodeid == root.nodeid
+
+    with pytest.raises(KeyError):
+        idb.netnode.get_netnode(small_idb, '$ does not exist')
+
+
+def test_load_tag(small_idb):
+    root = idb.netnode.Netnode(small_idb, ROOT_NODEID)
+
+    alts = root.load_tag(idb.netnode.TAGS.ALTVAL)
+    assert len(alts) == 6
+    assert list(alts) == list(root.alts())
+    for index in alts:
+        assert alts[index] == root.altval(index)
+    assert alts.get(0x1234) is None
+    assert 0x1234 not in alts
+    with pytest.raises(KeyError):
+        _ = alts[0x1234]
+
+    uints = root.load_tag(idb.netnode.TAGS.ALTVAL, decode='uint')
+    assert uints.items() == [(index, small_idb.uint(value)) for index, value in alts.items()]
+
+    sups = root.load_tag(idb.netnode.TAGS.SUPVAL)
+    assert sups.keys() == list(root.sups())
+    for index, value in sups.items():
+        assert isinstance(value, bytes)
+        assert value == root.supval(index)
+
+    lengths = root.load_tag(idb.netnode.TAGS.SUPVAL, decode=len)
+    assert lengths.values() == [len(v) for v in sups.values()]
+
+    with pytest.raises(ValueError):
+        root.load_tag(idb.netnode.TAGS.SUPVAL, decode='float')
+
+
+def test_key_codec(small_idb):
+    codec = idb.netnode.get_key_codec(4)
+    assert small_idb.key_codec is codec
+    assert idb.netnode.Netnode(small_idb, ROOT_NODEID).key_codec is codec
+
+    assert codec.make_key('Root Node') == b'NRoot Node'
+    assert codec.make_key(0x401000, 'X') == b'.\x00\x40\x10\x00X'
+    assert codec.make_key(0x401000, 'X', 0x10) == b'.\x00\x40\x10\x00X\x00\x00\x00\x10'
+    assert codec.make_key(0x401000, 'X', -1) == b'.\x00\x40\x10\x00X\xff\xff\xff\xff'
+
+    codec64 = idb.netnode.get_key_codec(8)
+    key = codec64.make_key(0x401000, 'X', 0x10)
+    assert key == idb.netnode.make_key(0x401000, 'X', 0x10, wordsize=8)
+    assert codec64.parse_key(key) == (0x401000, 'X', 0x10)
+    assert codec64.parse_key(codec64.make_key(0x401000, 'X')) == (0x401000, 'X', None)
+
+    # the codec agrees with the keys found in the database.
+    for key, _ in small_idb.id0.scan(prefix=codec.make_key(0xFF000002, 'A')):
+        parsed = codec.parse_key(key)
+        assert parsed == idb.netnode.parse_key(key, wordsize=4)
+        assert codec.make_key(*parsed) == key
+
+    with pytest.raises(ValueError):
+        codec.make_key(0x401000)
+    with pytest.raises(ValueError):
+        codec.make_key(0x401000, 'XX')
+    with pytest.raises(ValueError):
+        codec.parse_key(b'NRoot Node')
+    with pytest.raises(ValueError):
+        idb.netnode.get_key_codec(2)
+
+
+def test_decode_ints(small_idb):
+    assert list(idb.netnode.decode_ints([])) == []
+    assert list(idb.netnode.decode_ints([b'\x01\x00', b'\xFF\xFF'])) == [1, 0xFFFF]
+    assert list(idb.netnode.decode_ints([b'\x01\x00', b'\xFF\xFF'], signed=True)) == [1, -1]
+    # values of different sizes are decoded in groups, but returned in order.
+    bufs = [b'\xFF', b'\xFE\xFF\xFF\xFF', b'\x03\x00', b'\xFC\xFF\xFF\xFF\xFF\xFF\xFF\xFF']
+    assert list(idb.netnode.decode_ints(bufs, signed=True)) == [-1, -2, 3, -4]
+    assert list(idb.netnode.decode_ints(bufs)) == [idb.netnode.as_uint(buf) for buf in bufs]
+
+    with pytest.raises(ValueError):
+        idb.netnode.decode_ints([b'\x01\x02\x03'])
+
+    root = idb.netnode.Netnode(small_idb, ROOT_NODEID)
+    alts = root.load_tag(idb.netnode.TAGS.ALTVAL)
+    indices, values = alts.arrays()
+    assert list(indices) == list(root.alts())
+    assert list(values) == [root.altval(index) for index in indices]
+
+
+def test_blob(small_idb):
+    root = idb.netnode.Netnode(small_idb, ROOT_NODEID)
+    # the root node has supvals at 0x514 through 0x517.
+    expected = b''.join(root.supval(index) for index in range(0x514, 0x518))
+    assert 0x518 not in root.load_tag(idb.netnode.TAGS.SUPVAL)
+
+    assert root.getblob(0x514) == expected
+    assert root.blobsize(0x514) == len(expected)
+    assert b''.join(root.iterblob(0x514)) == expected
+    # a blob may start from any index.
+    assert root.getblob(0x516) == expected[len(root.supval(0x514)) + len(root.supval(0x515)):]
+
+    buf = bytearray(len(expected) + 0x10)
+    assert root.readblob(buf, 0x514) == len(expected)
+    assert bytes(buf[:len(expected)]) == expected
+    with pytest.raises(ValueError):
+        root.readblob(bytearray(len(expected) - 1), 0x514)
+
+    assert root.getblob(0x513) is None
+    assert root.blobsize(0x513) == 0
+    assert list(root.iterblob(0x513)) == []